@@ -1,11 +1,26 @@
 """Database manager for alLot application."""
+import logging
 import os
+import re
+from contextlib import contextmanager
 from pathlib import Path
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, insert, text
 from sqlalchemy.orm import sessionmaker, scoped_session
-from database.models import Base, User
+from database.models import Base, User, Product, Purchase, PurchaseItem, PurchaseRange
 import bcrypt
 
+logger = logging.getLogger(__name__)
+
+# Purchase notes line: "Ticket Name | Series XXX | from-to | Qty N @ rate"
+_NOTES_ENTRY_RE = re.compile(
+    r'^(.+?)\s*\|\s*Series\s+(\w*)\s*\|\s*(\d+)-(\d+)\s*\|\s*Qty\s+\d+\s*@\s*([\d.]+)'
+)
+
+# PRAGMA user_version once purchase_ranges has been backfilled from purchase notes
+_PURCHASE_RANGES_BACKFILLED = 1
+# Purchases per item query; keeps IN (...) well under SQLite's bound parameter limit
+_BACKFILL_CHUNK = 500
+
 
 class DatabaseManager:
     """Manages database connection and initialization."""
@@ -36,6 +51,10 @@ class DatabaseManager:
         
         # Create all tables
         Base.metadata.create_all(self.engine)
+        # create_all skips existing tables; add indexes defined after a table was created
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(self.engine, checkfirst=True)
         
         # Create session factory
         session_factory = sessionmaker(bind=self.engine)
@@ -43,6 +62,9 @@ class DatabaseManager:
         
         # Create default admin user if not exists
         self._create_default_user()
+        
+        # Fill purchase_ranges for purchases saved before the table existed
+        self._backfill_purchase_ranges()
     
     def _create_default_user(self):
         """Create default admin user."""
@@ -68,10 +90,95 @@ class DatabaseManager:
         finally:
             session.close()
     
+    def _backfill_purchase_ranges(self):
+        """Populate purchase_ranges from the notes of purchases saved before the table existed.
+
+        Runs once per database: PRAGMA user_version records that the backfill is done,
+        so purchases whose lines never map to a product are not re-scanned on every launch.
+        """
+        session = self.Session()
+        try:
+            if session.execute(text('PRAGMA user_version')).scalar() >= _PURCHASE_RANGES_BACKFILLED:
+                return
+            
+            # Outer join instead of NOT IN / IN (ids): no bound parameter per purchase
+            missing = session.query(Purchase.id, Purchase.purchase_date, Purchase.notes).outerjoin(
+                PurchaseRange, PurchaseRange.purchase_id == Purchase.id
+            ).filter(
+                Purchase.notes.isnot(None),
+                PurchaseRange.id.is_(None)
+            ).order_by(Purchase.id).all()
+            product_ids = None
+            
+            inserted = 0
+            skipped = 0
+            for start in range(0, len(missing), _BACKFILL_CHUNK):
+                chunk = missing[start:start + _BACKFILL_CHUNK]
+                # Notes hold one line per item in item order, so lines map to items by position;
+                # fall back to the current product name only when the counts disagree
+                item_products = {}
+                for purchase_id, product_id in session.query(
+                    PurchaseItem.purchase_id, PurchaseItem.product_id
+                ).filter(
+                    PurchaseItem.purchase_id.in_([purchase_id for purchase_id, _, _ in chunk])
+                ).order_by(PurchaseItem.id):
+                    item_products.setdefault(purchase_id, []).append(product_id)
+                
+                ranges = []
+                for purchase_id, purchase_date, notes in chunk:
+                    matches = [match for match in map(_NOTES_ENTRY_RE.match, notes.split('\n')) if match]
+                    products = item_products.get(purchase_id, [])
+                    if len(products) != len(matches):
+                        if product_ids is None:
+                            product_ids = {name: product_id for product_id, name in session.query(Product.id, Product.name).all()}
+                        products = [product_ids.get(match.group(1).strip()) for match in matches]
+                    for match, product_id in zip(matches, products):
+                        if product_id is None:
+                            skipped += 1
+                            continue
+                        ranges.append({
+                            'purchase_id': purchase_id,
+                            'product_id': product_id,
+                            'series': match.group(2),
+                            'from_no': int(match.group(3)),
+                            'to_no': int(match.group(4)),
+                            'draw_date': purchase_date.date(),
+                            'rate': float(match.group(5))
+                        })
+                if ranges:
+                    session.execute(insert(PurchaseRange), ranges)
+                    inserted += len(ranges)
+            
+            # Marked in the same transaction as the inserted ranges
+            session.execute(text(f'PRAGMA user_version = {_PURCHASE_RANGES_BACKFILLED}'))
+            session.commit()
+            if inserted:
+                logger.info("Backfilled %d purchase range(s) from notes", inserted)
+            if skipped:
+                logger.warning("Skipped %d purchase notes line(s) whose ticket could not be matched to a product", skipped)
+        except Exception:
+            session.rollback()
+            logger.exception("Error backfilling purchase ranges")
+        finally:
+            session.close()
+    
     def get_session(self):
         """Get a new database session."""
         return self.Session()
     
+    @contextmanager
+    def session_scope(self):
+        """Session for one UI action: committed on success, rolled back on error, always closed."""
+        session = self.Session()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    
     def close(self):
         """Close database connection."""
         if self.Session:
@@ -1,6 +1,6 @@
 """Database models for alLot application."""
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Text, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -116,6 +116,7 @@ class Purchase(Base):
     # Relationships
     distributor = relationship("Distributor", back_populates="purchases")
     items = relationship("PurchaseItem", back_populates="purchase", cascade="all, delete-orphan")
+    ranges = relationship("PurchaseRange", back_populates="purchase", cascade="all, delete-orphan")
 
 
 class PurchaseItem(Base):
@@ -134,9 +135,33 @@ class PurchaseItem(Base):
     product = relationship("Product")
 
 
+class PurchaseRange(Base):
+    """Ticket number range bought in a purchase (one per purchase notes line)."""
+    __tablename__ = 'purchase_ranges'
+    __table_args__ = (
+        Index('ix_purchase_ranges_draw_date_product', 'draw_date', 'product_id'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    purchase_id = Column(Integer, ForeignKey('purchases.id'), nullable=False)
+    product_id = Column(Integer, ForeignKey('products.id'), nullable=False)
+    series = Column(String(20), nullable=False, default='')
+    from_no = Column(Integer, nullable=False)
+    to_no = Column(Integer, nullable=False)
+    draw_date = Column(Date, nullable=False)  # Date part of the purchase date
+    rate = Column(Float, nullable=False)
+    
+    # Relationships
+    purchase = relationship("Purchase", back_populates="ranges")
+    product = relationship("Product")
+
+
 class Sale(Base):
     """Sale transaction header."""
     __tablename__ = 'sales'
+    __table_args__ = (
+        Index('ix_sales_sale_date', 'sale_date'),
+    )
     
     id = Column(Integer, primary_key=True)
     sale_number = Column(String(50), unique=True, nullable=False)
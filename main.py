@@ -44,8 +44,8 @@ def main():
     
     def on_login_success(user):
         """Handle successful login."""
-        main_window = MainWindow(user)
-        main_window.show()
+        # MainWindow shows itself (maximized) once the event loop is idle
+        login_window.main_window = MainWindow(user)
     
     login_window.login_successful.connect(on_login_success)
     login_window.show()
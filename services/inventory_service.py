@@ -1,7 +1,7 @@
 """Inventory and stock management service."""
 from datetime import datetime
-from sqlalchemy import func
-from database.models import Product, StockLedger, Purchase, PurchaseItem, Sale, SaleItem
+from sqlalchemy import func, insert
+from database.models import Product, StockLedger, Purchase, PurchaseItem, PurchaseRange, Sale, SaleItem
 from database.db_manager import db_manager
 
 
@@ -48,7 +48,9 @@ class InventoryService:
         Args:
             distributor_id: Distributor ID
             purchase_date: Purchase date
-            items: List of dicts with keys: product_id, quantity, rate
+            items: List of dicts with keys: product_id, quantity, rate and optionally
+                amount (precomputed quantity * rate), series, from_no, to_no
+                (items with from_no/to_no are also recorded as purchase ranges)
             invoice_number: Optional invoice number
             notes: Optional notes
             
@@ -62,7 +64,8 @@ class InventoryService:
             purchase_num = f"PUR{(last_purchase.id + 1):06d}" if last_purchase else "PUR000001"
             
             # Calculate total
-            total_amount = sum(item['quantity'] * item['rate'] for item in items)
+            amounts = [item.get('amount', item['quantity'] * item['rate']) for item in items]
+            total_amount = sum(amounts)
             
             # Create purchase header
             purchase = Purchase(
@@ -76,25 +79,42 @@ class InventoryService:
             session.add(purchase)
             session.flush()  # Get purchase ID
             
-            # Create purchase items and stock ledger entries
-            for item in items:
-                purchase_item = PurchaseItem(
-                    purchase_id=purchase.id,
-                    product_id=item['product_id'],
-                    quantity=item['quantity'],
-                    rate=item['rate'],
-                    amount=item['quantity'] * item['rate']
-                )
-                session.add(purchase_item)
-                
-                # Add to stock ledger
-                stock_entry = StockLedger(
-                    product_id=item['product_id'],
-                    transaction_type='purchase',
-                    transaction_id=purchase.id,
-                    quantity_delta=item['quantity']
-                )
-                session.add(stock_entry)
+            # Create purchase items and stock ledger entries (one executemany each)
+            session.execute(insert(PurchaseItem), [
+                {
+                    'purchase_id': purchase.id,
+                    'product_id': item['product_id'],
+                    'quantity': item['quantity'],
+                    'rate': item['rate'],
+                    'amount': amount
+                }
+                for item, amount in zip(items, amounts)
+            ])
+            # Ticket ranges, used by the sale stock check and the stock view
+            ranges = [
+                {
+                    'purchase_id': purchase.id,
+                    'product_id': item['product_id'],
+                    'series': item.get('series') or '',
+                    'from_no': item['from_no'],
+                    'to_no': item['to_no'],
+                    'draw_date': purchase_date.date() if isinstance(purchase_date, datetime) else purchase_date,
+                    'rate': item['rate']
+                }
+                for item in items
+                if item.get('from_no') is not None and item.get('to_no') is not None
+            ]
+            if ranges:
+                session.execute(insert(PurchaseRange), ranges)
+            session.execute(insert(StockLedger), [
+                {
+                    'product_id': item['product_id'],
+                    'transaction_type': 'purchase',
+                    'transaction_id': purchase.id,
+                    'quantity_delta': item['quantity']
+                }
+                for item in items
+            ])
             
             session.commit()
             return True, "Purchase created successfully", purchase.id
@@ -112,7 +132,8 @@ class InventoryService:
         Args:
             party_id: Party ID
             sale_date: Sale date
-            items: List of dicts with keys: product_id, quantity, rate
+            items: List of dicts with keys: product_id, quantity, rate and optionally
+                amount (precomputed quantity * rate)
             invoice_number: Optional invoice number
             notes: Optional notes
             
@@ -121,11 +142,12 @@ class InventoryService:
         """
         session = db_manager.get_session()
         try:
-            # Check stock availability
+            # Check stock availability (one grouped query for all products)
+            stock = dict(session.query(StockLedger.product_id, func.sum(StockLedger.quantity_delta)).filter(
+                StockLedger.product_id.in_({item['product_id'] for item in items})
+            ).group_by(StockLedger.product_id).all())
             for item in items:
-                current_stock = session.query(func.sum(StockLedger.quantity_delta)).filter(
-                    StockLedger.product_id == item['product_id']
-                ).scalar() or 0.0
+                current_stock = stock.get(item['product_id']) or 0.0
                 
                 if current_stock < item['quantity']:
                     product = session.query(Product).get(item['product_id'])
@@ -136,7 +158,8 @@ class InventoryService:
             sale_num = f"SAL{(last_sale.id + 1):06d}" if last_sale else "SAL000001"
             
             # Calculate total
-            total_amount = sum(item['quantity'] * item['rate'] for item in items)
+            amounts = [item.get('amount', item['quantity'] * item['rate']) for item in items]
+            total_amount = sum(amounts)
             
             # Create sale header
             sale = Sale(
@@ -150,25 +173,26 @@ class InventoryService:
             session.add(sale)
             session.flush()  # Get sale ID
             
-            # Create sale items and stock ledger entries
-            for item in items:
-                sale_item = SaleItem(
-                    sale_id=sale.id,
-                    product_id=item['product_id'],
-                    quantity=item['quantity'],
-                    rate=item['rate'],
-                    amount=item['quantity'] * item['rate']
-                )
-                session.add(sale_item)
-                
-                # Deduct from stock ledger
-                stock_entry = StockLedger(
-                    product_id=item['product_id'],
-                    transaction_type='sale',
-                    transaction_id=sale.id,
-                    quantity_delta=-item['quantity']  # Negative for sale
-                )
-                session.add(stock_entry)
+            # Create sale items and stock ledger entries (one executemany each)
+            session.execute(insert(SaleItem), [
+                {
+                    'sale_id': sale.id,
+                    'product_id': item['product_id'],
+                    'quantity': item['quantity'],
+                    'rate': item['rate'],
+                    'amount': amount
+                }
+                for item, amount in zip(items, amounts)
+            ])
+            session.execute(insert(StockLedger), [
+                {
+                    'product_id': item['product_id'],
+                    'transaction_type': 'sale',
+                    'transaction_id': sale.id,
+                    'quantity_delta': -item['quantity']  # Negative for sale
+                }
+                for item in items
+            ])
             
             session.commit()
             return True, "Sale created successfully", sale.id
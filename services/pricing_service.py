@@ -35,6 +35,34 @@ class PricingService:
         finally:
             session.close()
     
+    @staticmethod
+    def get_all_purchase_rates():
+        """
+        Get every distributor's default purchase rate and all product-specific prices.
+        
+        The rate for a pair is overrides[(distributor_id, product_id)] when present,
+        otherwise defaults[distributor_id] (the same fallback as get_purchase_rate).
+        
+        Returns:
+            Tuple (defaults, overrides): dict mapping distributor_id to float rate and
+            dict mapping (distributor_id, product_id) to float rate
+        """
+        from database.models import Distributor
+        session = db_manager.get_session()
+        try:
+            defaults = dict(session.query(Distributor.id, Distributor.purchase_rate).all())
+            overrides = {
+                (distributor_id, product_id): purchase_rate
+                for distributor_id, product_id, purchase_rate in session.query(
+                    DistributorPrice.distributor_id,
+                    DistributorPrice.product_id,
+                    DistributorPrice.purchase_rate
+                ).all()
+            }
+            return defaults, overrides
+        finally:
+            session.close()
+    
     @staticmethod
     def get_sale_rate(party_id, product_id):
         """
@@ -63,7 +91,37 @@ class PricingService:
             return party.sell_rate if party else 0.0
         finally:
             session.close()
-    
+
+    @staticmethod
+    def get_sale_rates_bulk(party_id, product_ids):
+        """
+        Get sale rates for several products to a specific party.
+
+        Args:
+            party_id: Party ID
+            product_ids: Iterable of product IDs
+
+        Returns:
+            Dict mapping product_id to float rate
+        """
+        from database.models import Party
+        session = db_manager.get_session()
+        try:
+            product_ids = list(product_ids)
+            party_rate = session.query(Party.sell_rate).filter(Party.id == party_id).scalar()
+
+            # Party's default rate, overridden by product-specific prices
+            rates = dict.fromkeys(product_ids, party_rate if party_rate is not None else 0.0)
+            for product_id, sale_rate in session.query(PartyPrice.product_id, PartyPrice.sale_rate).filter(
+                PartyPrice.party_id == party_id,
+                PartyPrice.product_id.in_(product_ids)
+            ).all():
+                rates[product_id] = sale_rate
+
+            return rates
+        finally:
+            session.close()
+
     @staticmethod
     def set_distributor_price(distributor_id, product_id, purchase_rate):
         """
@@ -1,6 +1,6 @@
 """Reporting service for alLot."""
 from datetime import datetime
-from sqlalchemy import func, and_
+from sqlalchemy import exists, func, and_, select
 from database.models import Purchase, PurchaseItem, Sale, SaleItem, Product, Distributor, Party, StockLedger
 from database.db_manager import db_manager
 from reportlab.lib.pagesizes import letter, A4
@@ -14,6 +14,52 @@ from reportlab.lib.enums import TA_CENTER, TA_RIGHT
 class ReportService:
     """Handles report generation."""
     
+    # Detail rows per Table flowable; see _detail_tables
+    DETAIL_CHUNK_ROWS = 500
+    DETAIL_COL_WIDTHS = [1.2 * inch, 1.3 * inch, 2 * inch, 0.8 * inch, 1.2 * inch]
+    
+    @staticmethod
+    def _purchase_filters(start_date=None, end_date=None, distributor_id=None):
+        """Filter conditions shared by the purchase report and its existence check."""
+        filters = []
+        if start_date:
+            filters.append(Purchase.purchase_date >= start_date)
+        if end_date:
+            filters.append(Purchase.purchase_date <= end_date)
+        if distributor_id:
+            filters.append(Purchase.distributor_id == distributor_id)
+        return filters
+    
+    @staticmethod
+    def _sale_filters(start_date=None, end_date=None, party_id=None):
+        """Filter conditions shared by the sale report and its existence check."""
+        filters = []
+        if start_date:
+            filters.append(Sale.sale_date >= start_date)
+        if end_date:
+            filters.append(Sale.sale_date <= end_date)
+        if party_id:
+            filters.append(Sale.party_id == party_id)
+        return filters
+    
+    @staticmethod
+    def has_purchase_records(start_date=None, end_date=None, distributor_id=None):
+        """Check whether the purchase report would have any rows (one EXISTS query)."""
+        with db_manager.session_scope() as session:
+            return session.execute(select(exists().where(
+                Purchase.distributor_id == Distributor.id,
+                *ReportService._purchase_filters(start_date, end_date, distributor_id)
+            ))).scalar()
+    
+    @staticmethod
+    def has_sale_records(start_date=None, end_date=None, party_id=None):
+        """Check whether the sale report would have any rows (one EXISTS query)."""
+        with db_manager.session_scope() as session:
+            return session.execute(select(exists().where(
+                Sale.party_id == Party.id,
+                *ReportService._sale_filters(start_date, end_date, party_id)
+            ))).scalar()
+    
     @staticmethod
     def get_purchase_report(start_date=None, end_date=None, distributor_id=None):
         """
@@ -25,34 +71,27 @@ class ReportService:
             distributor_id: Optional distributor filter
             
         Returns:
-            List of purchase records with details
+            Iterator of purchase records with details. Rows are fetched in batches
+            and the session stays open until the iterator is exhausted or closed.
         """
         session = db_manager.get_session()
         try:
-            query = session.query(Purchase, Distributor).join(Distributor)
+            query = session.query(Purchase, Distributor).join(Distributor).filter(
+                *ReportService._purchase_filters(start_date, end_date, distributor_id)
+            )
             
-            if start_date:
-                query = query.filter(Purchase.purchase_date >= start_date)
-            if end_date:
-                query = query.filter(Purchase.purchase_date <= end_date)
-            if distributor_id:
-                query = query.filter(Purchase.distributor_id == distributor_id)
+            purchases = query.order_by(Purchase.purchase_date.desc()).yield_per(500)
             
-            purchases = query.order_by(Purchase.purchase_date.desc()).all()
-            
-            result = []
             for purchase, distributor in purchases:
                 items = session.query(PurchaseItem, Product).join(Product).filter(
                     PurchaseItem.purchase_id == purchase.id
                 ).all()
                 
-                result.append({
+                yield {
                     'purchase': purchase,
                     'distributor': distributor,
                     'items': items
-                })
-            
-            return result
+                }
         finally:
             session.close()
     
@@ -67,34 +106,27 @@ class ReportService:
             party_id: Optional party filter
             
         Returns:
-            List of sale records with details
+            Iterator of sale records with details. Rows are fetched in batches
+            and the session stays open until the iterator is exhausted or closed.
         """
         session = db_manager.get_session()
         try:
-            query = session.query(Sale, Party).join(Party)
-            
-            if start_date:
-                query = query.filter(Sale.sale_date >= start_date)
-            if end_date:
-                query = query.filter(Sale.sale_date <= end_date)
-            if party_id:
-                query = query.filter(Sale.party_id == party_id)
+            query = session.query(Sale, Party).join(Party).filter(
+                *ReportService._sale_filters(start_date, end_date, party_id)
+            )
             
-            sales = query.order_by(Sale.sale_date.desc()).all()
+            sales = query.order_by(Sale.sale_date.desc()).yield_per(500)
             
-            result = []
             for sale, party in sales:
                 items = session.query(SaleItem, Product).join(Product).filter(
                     SaleItem.sale_id == sale.id
                 ).all()
                 
-                result.append({
+                yield {
                     'sale': sale,
                     'party': party,
                     'items': items
-                })
-            
-            return result
+                }
         finally:
             session.close()
     
@@ -121,10 +153,25 @@ class ReportService:
         
         elements.append(Spacer(1, 0.3 * inch))
         
-        # Summary table
-        total_purchases = len(report_data)
-        total_amount = sum(item['purchase'].total_amount for item in report_data)
+        # Detail tables and totals come from one pass over the records,
+        # so report_data can be a one-shot iterator
+        def detail_rows():
+            for item in report_data:
+                purchase = item['purchase']
+                row = [
+                    purchase.purchase_date.strftime('%d/%m/%Y'),
+                    purchase.purchase_number,
+                    item['distributor'].name,
+                    str(len(item['items'])),
+                    f"₹ {purchase.total_amount:,.2f}"
+                ]
+                yield row, purchase.total_amount
+        
+        detail_tables, total_purchases, total_amount = ReportService._detail_tables(
+            ['Date', 'Purchase #', 'Distributor', 'Items', 'Amount'], detail_rows()
+        )
         
+        # Summary table
         summary_data = [
             ['Total Purchases', str(total_purchases)],
             ['Total Amount', f"₹ {total_amount:,.2f}"]
@@ -138,34 +185,7 @@ class ReportService:
         elements.append(summary_table)
         elements.append(Spacer(1, 0.3 * inch))
         
-        # Detailed table
-        table_data = [['Date', 'Purchase #', 'Distributor', 'Items', 'Amount']]
-        
-        for item in report_data:
-            purchase = item['purchase']
-            distributor = item['distributor']
-            items_count = len(item['items'])
-            
-            table_data.append([
-                purchase.purchase_date.strftime('%d/%m/%Y'),
-                purchase.purchase_number,
-                distributor.name,
-                str(items_count),
-                f"₹ {purchase.total_amount:,.2f}"
-            ])
-        
-        detail_table = Table(table_data, colWidths=[1.2 * inch, 1.3 * inch, 2 * inch, 0.8 * inch, 1.2 * inch])
-        detail_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ]))
-        elements.append(detail_table)
+        elements.extend(detail_tables)
         
         doc.build(elements)
     
@@ -192,10 +212,25 @@ class ReportService:
         
         elements.append(Spacer(1, 0.3 * inch))
         
-        # Summary table
-        total_sales = len(report_data)
-        total_amount = sum(item['sale'].total_amount for item in report_data)
+        # Detail tables and totals come from one pass over the records,
+        # so report_data can be a one-shot iterator
+        def detail_rows():
+            for item in report_data:
+                sale = item['sale']
+                row = [
+                    sale.sale_date.strftime('%d/%m/%Y'),
+                    sale.sale_number,
+                    item['party'].name,
+                    str(len(item['items'])),
+                    f"₹ {sale.total_amount:,.2f}"
+                ]
+                yield row, sale.total_amount
+        
+        detail_tables, total_sales, total_amount = ReportService._detail_tables(
+            ['Date', 'Sale #', 'Party', 'Items', 'Amount'], detail_rows()
+        )
         
+        # Summary table
         summary_data = [
             ['Total Sales', str(total_sales)],
             ['Total Amount', f"₹ {total_amount:,.2f}"]
@@ -209,24 +244,27 @@ class ReportService:
         elements.append(summary_table)
         elements.append(Spacer(1, 0.3 * inch))
         
-        # Detailed table
-        table_data = [['Date', 'Sale #', 'Party', 'Items', 'Amount']]
+        elements.extend(detail_tables)
         
-        for item in report_data:
-            sale = item['sale']
-            party = item['party']
-            items_count = len(item['items'])
-            
-            table_data.append([
-                sale.sale_date.strftime('%d/%m/%Y'),
-                sale.sale_number,
-                party.name,
-                str(items_count),
-                f"₹ {sale.total_amount:,.2f}"
-            ])
-        
-        detail_table = Table(table_data, colWidths=[1.2 * inch, 1.3 * inch, 2 * inch, 0.8 * inch, 1.2 * inch])
-        detail_table.setStyle(TableStyle([
+        doc.build(elements)
+    
+    @staticmethod
+    def _detail_tables(header, detail_rows):
+        """
+        Lay out (row, amount) pairs as consecutive tables of DETAIL_CHUNK_ROWS rows.
+        
+        Returns (tables, row_count, total_amount). Rows go straight into the table
+        being filled, so no list of every row is built first. Platypus splits a table
+        at each page break by copying all of its remaining rows, so one large table
+        costs rows x pages to lay out; fixed-size tables keep every split small.
+        Only the first table carries the header row.
+        """
+        body_style = [
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('BACKGROUND', (0, 0), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ]
+        header_style = [
             ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
             ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
@@ -235,7 +273,28 @@ class ReportService:
             ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
             ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
             ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ]))
-        elements.append(detail_table)
-        
-        doc.build(elements)
+        ]
+        chunk_rows = ReportService.DETAIL_CHUNK_ROWS
+        tables = []
+        # First table: header plus chunk_rows rows; the rest continue directly below it
+        chunk = [header]
+        chunk_limit = chunk_rows + 1
+        row_count = 0
+        total_amount = 0
+        for row, amount in detail_rows:
+            chunk.append(row)
+            row_count += 1
+            total_amount += amount
+            if len(chunk) == chunk_limit:
+                tables.append(ReportService._detail_table(chunk, header_style if not tables else body_style))
+                chunk = []
+                chunk_limit = chunk_rows
+        if chunk:
+            tables.append(ReportService._detail_table(chunk, header_style if not tables else body_style))
+        return tables, row_count, total_amount
+    
+    @staticmethod
+    def _detail_table(rows, style):
+        table = Table(rows, colWidths=ReportService.DETAIL_COL_WIDTHS)
+        table.setStyle(TableStyle(style))
+        return table
@@ -0,0 +1,18 @@
+"""Test setup: a throwaway database and an offscreen Qt application."""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# db_manager opens its database on import, so point it at a temporary directory first
+os.environ['APPDATA'] = tempfile.mkdtemp(prefix='allot-tests-')
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    from PySide6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
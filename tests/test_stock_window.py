@@ -0,0 +1,109 @@
+"""Remaining stock after sales, including sales of products renamed since."""
+from datetime import date, datetime
+
+import pytest
+
+from database.db_manager import db_manager
+from database.models import Distributor, Party, Product
+from services.inventory_service import InventoryService
+from ui.purchase_window import PurchaseWindow
+from ui.sale_window import SaleWindow
+from ui.stock_window import StockWindow
+from utils.helpers import subtract_ranges
+
+DRAW_DATE = date(2030, 1, 15)
+
+
+def _notes_line(ticket, from_no, to_no, qty, rate):
+    return f"{ticket} | Series  | {from_no}-{to_no} | Qty {qty} @ {rate:.2f}"
+
+
+@pytest.fixture(scope='module')
+def sold_then_renamed():
+    """Buy M5 100-199, sell 100-149, then rename the product; returns the product id."""
+    with db_manager.session_scope() as session:
+        distributor = Distributor(name='Rename Dist', purchase_rate=4.0)
+        party = Party(name='Rename Party', sell_rate=6.0)
+        product = Product(sku='RN5', name='RN5', unit='pcs')
+        session.add_all([distributor, party, product])
+        session.flush()
+        distributor_id, party_id, product_id = distributor.id, party.id, product.id
+
+    ok, message, _ = InventoryService.create_purchase(
+        distributor_id, datetime.combine(DRAW_DATE, datetime.min.time()),
+        [{'product_id': product_id, 'quantity': 500, 'rate': 4.0, 'from_no': 100, 'to_no': 199}],
+        notes=_notes_line('RN5', 100, 199, 500, 4.0)
+    )
+    assert ok, message
+    ok, message, _ = InventoryService.create_sale(
+        party_id, datetime.combine(DRAW_DATE, datetime.min.time()),
+        [{'product_id': product_id, 'quantity': 250, 'rate': 6.0}],
+        notes=_notes_line('RN5', 100, 149, 250, 6.0)
+    )
+    assert ok, message
+
+    with db_manager.session_scope() as session:
+        session.get(Product, product_id).name = 'RN5 Renamed'
+    return product_id
+
+
+def test_remaining_stock_after_rename(qapp, sold_then_renamed):
+    window = StockWindow()
+    remaining = window.compute_remaining_stock(None, DRAW_DATE, DRAW_DATE)
+    window.deleteLater()
+
+    assert [(e.ticket, e.from_no, e.to_no, e.qty) for e in remaining] == [('RN5 Renamed', 150, 199, 250)]
+
+
+def test_sale_check_after_rename(qapp, sold_then_renamed):
+    window = SaleWindow()
+    purchased, sold = window.load_draw_ranges(DRAW_DATE)
+    window.deleteLater()
+
+    assert purchased[sold_then_renamed] == [(100, 199)]
+    assert sold[sold_then_renamed] == [(100, 149)]
+
+
+@pytest.mark.parametrize('line, expected', [
+    ('M5 | Series 61A | 1-100 | Qty 500 @ 5.00', ('M5', '61A', 1, 100, 500, 5.0)),
+    ('D10 | Series  | 45450-45499 | Qty 500 @ 6.44', ('D10', '', 45450, 45499, 500, 6.44)),
+    ('M5 | Series 12 | 1-100 | Qty 500 @ 5.00', ('M5', '12', 1, 100, 500, 5.0)),
+    ('M5 | Series ABC | 1-100 | Qty 500 @ 5.00', ('M5', 'ABC', 1, 100, 500, 5.0)),
+])
+def test_parse_entry_line(line, expected):
+    assert tuple(StockWindow.parse_entry_line(line))[:6] == expected
+
+
+@pytest.mark.parametrize('line', [
+    'M5 | Series 61A | 1-100 | Qty 500 @ nan',
+    'M5 | Series 61A | 1-100 | Qty 500 @ inf',
+    'M5 | Series 61A | 1-100 | Qty 500 @ -5',
+    'M5 | Series 6-A | 1-100 | Qty 500 @ 5.00',
+    'M5 | Series 61A | +1-100 | Qty 500 @ 5.00',
+    'M5 | Series 61A | 1-100 | Qty 5_00 @ 5.00',
+    'M5 | Series 61A | 1-100 | Qty 500',
+])
+def test_parse_entry_line_rejects(line):
+    assert StockWindow.parse_entry_line(line) is None
+
+
+def test_purchase_duplicate_after_rename(qapp, sold_then_renamed):
+    window = PurchaseWindow()
+    window.refresh_data()
+    duplicate, _ = window.check_duplicate_purchase(sold_then_renamed, 190, 250, DRAW_DATE)
+    fresh, _ = window.check_duplicate_purchase(sold_then_renamed, 200, 250, DRAW_DATE)
+    window.deleteLater()
+
+    assert duplicate
+    assert not fresh
+
+
+@pytest.mark.parametrize('purchased, sold, expected', [
+    ([(1, 100)], [], [(1, 100)]),
+    ([(1, 100)], [(1, 50)], [(51, 100)]),
+    ([(1, 50), (51, 100)], [(10, 20), (30, 40)], [(1, 9), (21, 29), (41, 100)]),
+    ([(1, 10), (20, 30)], [(5, 25)], [(1, 4), (26, 30)]),
+    ([(1, 10)], [(1, 10), (50, 60)], []),
+])
+def test_subtract_ranges(purchased, sold, expected):
+    assert subtract_ranges(purchased, sold) == expected
@@ -0,0 +1,79 @@
+"""Background thread for running database jobs off the GUI thread."""
+import queue
+import shiboken6
+from PySide6.QtCore import Qt, QThread, Signal
+from PySide6.QtWidgets import QApplication
+
+
+class DbWorker(QThread):
+    """Long-lived thread that runs database jobs one at a time, off the GUI thread.
+
+    Jobs are queued with submit(); each result is handed to its callback on the GUI thread.
+    Windows share one worker (DbWorker.shared()), which keeps SQLite writes serialized and
+    reuses the thread-local scoped session from job to job.
+    """
+
+    MAX_PENDING = 16
+
+    resultReady = Signal(object, object)  # job, result
+
+    _shared = None
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Unbounded, so stop() can always queue its sentinel; submit() enforces MAX_PENDING
+        self._jobs = queue.Queue()
+        # Emitted on the worker thread; delivered here, on the thread that owns this object
+        self.resultReady.connect(self._deliver)
+
+    @classmethod
+    def shared(cls):
+        """Return the application-wide worker, created on first use and stopped when the app quits."""
+        if cls._shared is None:
+            cls._shared = cls()
+            QApplication.instance().aboutToQuit.connect(cls._shared.stop)
+        return cls._shared
+
+    def submit(self, fn, *args, callback=None, owner=None, busy=False):
+        """Queue fn(*args); callback(result) runs on the GUI thread when it finishes.
+
+        The callback is dropped if owner (a QObject) has been deleted by then. With busy,
+        the wait cursor is shown until the job finishes. Returns False, without queuing,
+        when MAX_PENDING jobs are already waiting.
+        """
+        # Only the GUI thread queues jobs, so the size can't grow between check and put
+        if self._jobs.qsize() >= self.MAX_PENDING:
+            return False
+        self._jobs.put((fn, args, callback, owner, busy))
+        if busy:
+            QApplication.setOverrideCursor(Qt.WaitCursor)
+        if not self.isRunning():
+            self.start()
+        return True
+
+    def stop(self):
+        """Finish the queued jobs and end the thread; queuing the stop never blocks."""
+        if self.isRunning():
+            self._jobs.put(None)
+            self.wait()
+
+    def run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            fn, args, callback, _owner, busy = job
+            try:
+                result = fn(*args)
+            except Exception as e:
+                result = e
+            if callback is not None or busy:
+                self.resultReady.emit(job, result)
+
+    @staticmethod
+    def _deliver(job, result):
+        _fn, _args, callback, owner, busy = job
+        if busy:
+            QApplication.restoreOverrideCursor()
+        if callback is not None and (owner is None or shiboken6.isValid(owner)):
+            callback(result)
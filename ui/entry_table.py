@@ -0,0 +1,375 @@
+"""Ticket range entry table shared by the purchase and sale windows: row model and editor delegates."""
+import re
+import string
+from PySide6.QtWidgets import (
+    QComboBox, QAbstractItemDelegate, QStyledItemDelegate, QStyle, QStyleOptionButton,
+    QApplication, QLineEdit, QDoubleSpinBox, QSpinBox
+)
+from PySide6.QtCore import Qt, QRegularExpression, QAbstractTableModel, QModelIndex, QEvent, Signal
+from PySide6.QtGui import QRegularExpressionValidator
+
+
+# Series code: digits followed by one letter (e.g. 61A); blank means no series
+SERIES_PATTERN = r"^\d+[A-Za-z]$"
+
+_DIGITS_RE = re.compile(r'\d+')
+
+
+class EntryRowsModel(QAbstractTableModel):
+    """Table model holding ticket range entries as a list of plain dicts.
+
+    Each row holds the ticket under id_key ('product_id' for purchases, 'ticket_id' for
+    sales) plus series, from_no, to_no, qty, rate and amount. Qty and amount are recomputed
+    when a row changes and kept in running totals.
+    """
+
+    COL_INDEX = 0
+    COL_TICKET = 1
+    COL_SERIES = 2
+    COL_FROM = 3
+    COL_TO = 4
+    COL_QTY = 5
+    COL_RATE = 6
+    COL_AMOUNT = 7
+    COL_ACTIONS = 8
+
+    HEADERS = ["#", "Ticket", "Series", "From No.", "To No.", "Qty", "Rate", "Amount", ""]
+    EDITABLE_COLUMNS = (COL_TICKET, COL_SERIES, COL_FROM, COL_TO, COL_RATE)
+
+    totalsChanged = Signal()
+    ticketChanged = Signal(int)  # row whose ticket was changed
+
+    def __init__(self, id_key, parent=None, headers=None):
+        super().__init__(parent)
+        self.id_key = id_key
+        self.headers = list(headers) if headers is not None else self.HEADERS
+        self._rows = []
+        self._product_names = {}
+        self._multipliers = {}  # product id -> ticket multiplier
+        self.total_qty = 0
+        self.total_amount = 0.0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() in self.EDITABLE_COLUMNS:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        r = index.row()
+        col = index.column()
+        row = self._rows[r]
+        if role == Qt.DisplayRole:
+            if col == self.COL_INDEX:
+                return str(r + 1)
+            if col == self.COL_TICKET:
+                return self._product_names.get(row[self.id_key], "")
+            if col == self.COL_SERIES:
+                return row['series']
+            if col == self.COL_FROM:
+                return str(row['from_no'])
+            if col == self.COL_TO:
+                return str(row['to_no'])
+            if col == self.COL_QTY:
+                return str(row['qty'])
+            if col == self.COL_RATE:
+                return f"{row['rate']:.2f}"
+            if col == self.COL_AMOUNT:
+                return f"₹ {row['amount']:,.2f}"
+        elif role == Qt.EditRole:
+            if col == self.COL_TICKET:
+                return row[self.id_key]
+            if col == self.COL_SERIES:
+                return row['series']
+            if col == self.COL_FROM:
+                return row['from_no']
+            if col == self.COL_TO:
+                return row['to_no']
+            if col == self.COL_QTY:
+                return row['qty']
+            if col == self.COL_RATE:
+                return row['rate']
+            if col == self.COL_AMOUNT:
+                return row['amount']
+        elif role == Qt.TextAlignmentRole:
+            if col in (self.COL_RATE, self.COL_AMOUNT):
+                return Qt.AlignRight | Qt.AlignVCenter
+            if col != self.COL_TICKET:
+                return Qt.AlignCenter
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        r = index.row()
+        col = index.column()
+        row = self._rows[r]
+        if col == self.COL_TICKET:
+            key = self.id_key
+        elif col == self.COL_SERIES:
+            key, value = 'series', (value or "").upper()
+        elif col == self.COL_FROM:
+            key, value = 'from_no', int(value)
+        elif col == self.COL_TO:
+            key, value = 'to_no', self.complete_to_no(row['from_no'], int(value))
+        elif col == self.COL_RATE:
+            key, value = 'rate', float(value)
+        else:
+            return False
+        if row[key] == value:
+            return True
+        row[key] = value
+        self._recalc_row(r)
+        # Only the edited cell through Amount can change in this row
+        self.dataChanged.emit(index, self.index(r, self.COL_AMOUNT))
+        if col == self.COL_TICKET:
+            self.ticketChanged.emit(r)
+        return True
+
+    def insertRows(self, row, count, parent=QModelIndex()):
+        if parent.isValid() or row < 0 or row > len(self._rows) or count < 1:
+            return False
+        self.beginInsertRows(parent, row, row + count - 1)
+        for _ in range(count):
+            self._rows.insert(row, self._blank_row())
+        self.endInsertRows()
+        return True
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        if parent.isValid() or row < 0 or count < 1 or row + count > len(self._rows):
+            return False
+        removed = self._rows[row:row + count]
+        self.beginRemoveRows(parent, row, row + count - 1)
+        del self._rows[row:row + count]
+        self.endRemoveRows()
+        # Later rows are renumbered by data(), only the "#" column needs repainting
+        if row < len(self._rows):
+            self.dataChanged.emit(self.index(row, self.COL_INDEX), self.index(len(self._rows) - 1, self.COL_INDEX))
+        self._add_to_totals(-sum(r['qty'] for r in removed), -sum(r['amount'] for r in removed))
+        return True
+
+    def set_products(self, products):
+        """Cache ticket names and quantity multipliers by product id."""
+        self._product_names = dict(products)
+        self._multipliers = {pid: self.extract_ticket_multiplier(pname) for pid, pname in products}
+
+    def product_name(self, product_id):
+        return self._product_names.get(product_id, "")
+
+    def row(self, r):
+        return self._rows[r]
+
+    def rows(self):
+        return self._rows
+
+    def is_row_empty(self, r):
+        """Check if a row is completely empty (no data entered)."""
+        # Row is empty if from/to are both at default value (0)
+        row = self._rows[r]
+        return row['from_no'] == 0 and row['to_no'] == 0
+
+    def append_row(self, ticket_id=None):
+        """Append a blank row for ticket_id and return its index."""
+        r = len(self._rows)
+        self.insertRows(r, 1)
+        self._rows[r][self.id_key] = ticket_id
+        return r
+
+    def set_rows(self, entries):
+        """Replace all rows with entries holding the id key, series, from_no, to_no and rate."""
+        self.beginResetModel()
+        self._rows = []
+        self.total_qty = 0
+        self.total_amount = 0.0
+        for entry in entries:
+            row = self._blank_row()
+            row.update(
+                series=entry['series'],
+                from_no=entry['from_no'],
+                to_no=entry['to_no'],
+                rate=entry['rate']
+            )
+            row[self.id_key] = entry[self.id_key]
+            self._rows.append(row)
+            self._recalc_row(len(self._rows) - 1, notify=False)
+        self.endResetModel()
+        self.totalsChanged.emit()
+
+    def clear(self):
+        self.set_rows([])
+
+    @staticmethod
+    def extract_ticket_multiplier(ticket_name):
+        """Extract numeric multiplier from ticket name (e.g., 'M5' -> 5, 'D10' -> 10)."""
+        match = _DIGITS_RE.search(ticket_name)
+        return int(match.group()) if match else 1
+
+    @staticmethod
+    def complete_to_no(from_no, to_no):
+        """Smart auto-completion: a To No. shorter than From No. replaces its last digits."""
+        if from_no > 0 and to_no > 0:
+            from_str = str(from_no)
+            to_str = str(to_no)
+            if len(to_str) < len(from_str):
+                return int(from_str[:-len(to_str)] + to_str)
+        return to_no
+
+    def _blank_row(self):
+        return {self.id_key: None, 'series': "", 'from_no': 0, 'to_no': 0, 'qty': 0, 'rate': 0.0, 'amount': 0.0}
+
+    def _recalc_row(self, r, notify=True):
+        """Recompute qty/amount for a row and apply the difference to the running totals."""
+        row = self._rows[r]
+        f = row['from_no']
+        t = row['to_no']
+        base_qty = t - f + 1 if t >= f and f > 0 and t > 0 else 0
+
+        # Ticket multiplier from ticket name (e.g., M5 -> 5, D10 -> 10, E200 -> 200)
+        qty = base_qty * self._multipliers.get(row[self.id_key], 1)
+        amount = qty * row['rate']
+        delta_qty = qty - row['qty']
+        delta_amount = amount - row['amount']
+        row['qty'] = qty
+        row['amount'] = amount
+        if notify:
+            self._add_to_totals(delta_qty, delta_amount)
+        else:
+            self.total_qty += delta_qty
+            self.total_amount += delta_amount
+
+    def _add_to_totals(self, delta_qty, delta_amount):
+        if not (delta_qty or delta_amount):
+            return
+        self.total_qty += delta_qty
+        self.total_amount += delta_amount
+        if not self._rows:
+            # Drop accumulated float error once the table is empty
+            self.total_amount = 0.0
+        self.totalsChanged.emit()
+
+
+class EntryDelegate(QStyledItemDelegate):
+    """Base editor delegate: Enter commits and closes the editor with SubmitModelCache.
+
+    The windows listen for that hint to move on to the next column.
+    """
+
+    def eventFilter(self, editor, event):
+        if event.type() == QEvent.KeyPress and event.key() in (Qt.Key_Return, Qt.Key_Enter):
+            self.commitData.emit(editor)
+            self.closeEditor.emit(editor, QAbstractItemDelegate.SubmitModelCache)
+            return True
+        return super().eventFilter(editor, event)
+
+
+class TicketDelegate(EntryDelegate):
+    """Ticket column editor: a combo box of the window's products (window.product_model)."""
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.window = window
+
+    def createEditor(self, parent, option, index):
+        combo = QComboBox(parent)
+        # Shared with every editor, so opening one doesn't repopulate the list
+        combo.setModel(self.window.product_model)
+        return combo
+
+    def setEditorData(self, editor, index):
+        editor.setCurrentIndex(editor.findData(index.data(Qt.EditRole)))
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.currentData())
+
+
+class SeriesDelegate(EntryDelegate):
+    """Series column editor (digits + letter, auto uppercase)."""
+
+    _SERIES_RE = QRegularExpression(SERIES_PATTERN)
+    _SERIES_UPPER = str.maketrans(string.ascii_lowercase, string.ascii_uppercase)
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        # One validator shared by all series editors
+        self.validator = QRegularExpressionValidator(self._SERIES_RE, self)
+
+    def createEditor(self, parent, option, index):
+        series_edit = QLineEdit(parent)
+        series_edit.setValidator(self.validator)
+        # textEdited fires for user input only, so the setText below doesn't re-enter
+        series_edit.textEdited.connect(lambda text, e=series_edit: self.on_series_changed(e, text))
+        return series_edit
+
+    def on_series_changed(self, edit, text):
+        # Auto uppercase letters
+        upper = text.translate(self._SERIES_UPPER)
+        if upper != text:
+            edit.setText(upper)
+
+    def setEditorData(self, editor, index):
+        editor.setText(index.data(Qt.EditRole))
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.text())
+
+
+class SpinDelegate(EntryDelegate):
+    """From/To (integer) or Rate (decimal) spin box editor."""
+
+    RANGE = (0, 999999)
+
+    def __init__(self, parent, decimals=None):
+        super().__init__(parent)
+        self.decimals = decimals
+
+    def createEditor(self, parent, option, index):
+        if self.decimals is None:
+            spin = QSpinBox(parent)
+        else:
+            spin = QDoubleSpinBox(parent)
+            spin.setDecimals(self.decimals)
+        spin.setRange(*self.RANGE)
+        return spin
+
+    def setEditorData(self, editor, index):
+        editor.setValue(index.data(Qt.EditRole))
+        editor.selectAll()
+
+    def setModelData(self, editor, model, index):
+        editor.interpretText()
+        model.setData(index, editor.value())
+
+
+class RemoveButtonDelegate(QStyledItemDelegate):
+    """Paints a "Remove" button in the actions column instead of a widget per row."""
+
+    removeClicked = Signal(int)
+
+    def paint(self, painter, option, index):
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(2, 2, -2, -2)
+        button.text = "Remove"
+        button.state = option.state & QStyle.State_Enabled
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and option.rect.contains(event.position().toPoint()):
+            self.removeClicked.emit(index.row())
+            return True
+        return False
@@ -1,4 +1,5 @@
 """Main dashboard window for alLot application."""
+from functools import lru_cache
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                                QPushButton, QLabel, QFrame, QMessageBox, QStackedWidget, QTableWidget, QApplication)
 from PySide6.QtCore import Qt, QTimer, QDateTime, QEvent
@@ -14,6 +15,15 @@ from ui.stock_window import StockWindow
 from ui.reports_window import ReportsWindow
 
 
+@lru_cache(maxsize=None)
+def _bold_font(point_size):
+    """Return a shared bold font (created lazily, after QApplication exists)."""
+    font = QFont()
+    font.setPointSize(point_size)
+    font.setBold(True)
+    return font
+
+
 class MainWindow(QMainWindow):
     """Main application window with dashboard."""
     
@@ -90,7 +100,9 @@ class MainWindow(QMainWindow):
         # This catches all key events even if no widget has focus
         QApplication.instance().installEventFilter(self)
         
-        self.showMaximized()
+        # Defer the first show until construction has returned to the event loop,
+        # so the initial layout/paint pass only covers the current (dashboard) page
+        QTimer.singleShot(0, self.showMaximized)
     
     def check_unsaved_before_switch(self):
         """Check for unsaved entries in purchase/sale windows before switching screens."""
@@ -218,20 +230,14 @@ class MainWindow(QMainWindow):
         
         # Title
         title_label = QLabel("alLot")
-        title_font = QFont()
-        title_font.setPointSize(24)
-        title_font.setBold(True)
-        title_label.setFont(title_font)
+        title_label.setFont(_bold_font(24))
         header_layout.addWidget(title_label)
         
         header_layout.addStretch()
         
         # Right side container with username and datetime
         self.info_label = QLabel()
-        info_font = QFont()
-        info_font.setPointSize(11)
-        info_font.setBold(True)
-        self.info_label.setFont(info_font)
+        self.info_label.setFont(_bold_font(11))
         self.info_label.setAlignment(Qt.AlignRight)
         self.info_label.setStyleSheet("line-height: 1.2;")
         header_layout.addWidget(self.info_label)
@@ -329,10 +335,7 @@ class MainWindow(QMainWindow):
         
         # Title
         title_label = QLabel("Control Panel")
-        title_font = QFont()
-        title_font.setPointSize(22)
-        title_font.setBold(True)
-        title_label.setFont(title_font)
+        title_label.setFont(_bold_font(22))
         title_label.setStyleSheet("color: #212121; background: transparent;")
         layout.addWidget(title_label)
         
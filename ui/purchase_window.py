@@ -1,35 +1,41 @@
 """Purchase window for ticket-based purchases with ranges."""
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
-    QComboBox, QTableWidget, QTableWidgetItem, QDateEdit,
-    QLineEdit, QMessageBox, QDoubleSpinBox, QHeaderView, QSpinBox
+    QComboBox, QTableView, QDateEdit, QAbstractItemView, QAbstractItemDelegate,
+    QMessageBox, QHeaderView
 )
-from PySide6.QtCore import Qt, QDate, QRegularExpression
+from PySide6.QtCore import Qt, QDate, QEvent
 from datetime import date
-from PySide6.QtGui import QRegularExpressionValidator, QShortcut, QKeySequence
-from database.models import Distributor, Product, Purchase
+from PySide6.QtGui import QShortcut, QKeySequence, QStandardItemModel, QStandardItem
+from database.models import Distributor, Product, PurchaseRange
 from database.db_manager import db_manager
 from services.pricing_service import PricingService
 from services.inventory_service import InventoryService
+from ui.entry_table import (
+    EntryRowsModel, TicketDelegate, SeriesDelegate, SpinDelegate, RemoveButtonDelegate
+)
 
 
 class PurchaseWindow(QWidget):
     """Window for recording ticket purchases with ranges."""
 
-    COL_INDEX = 0
-    COL_TICKET = 1
-    COL_SERIES = 2
-    COL_FROM = 3
-    COL_TO = 4
-    COL_QTY = 5
-    COL_RATE = 6
-    COL_AMOUNT = 7
-    COL_ACTIONS = 8
+    COL_INDEX = EntryRowsModel.COL_INDEX
+    COL_TICKET = EntryRowsModel.COL_TICKET
+    COL_SERIES = EntryRowsModel.COL_SERIES
+    COL_FROM = EntryRowsModel.COL_FROM
+    COL_TO = EntryRowsModel.COL_TO
+    COL_QTY = EntryRowsModel.COL_QTY
+    COL_RATE = EntryRowsModel.COL_RATE
+    COL_AMOUNT = EntryRowsModel.COL_AMOUNT
+    COL_ACTIONS = EntryRowsModel.COL_ACTIONS
 
     def __init__(self):
         super().__init__()
         self.products = []
+        self.product_model = QStandardItemModel(self)  # Ticket list shared by ticket editors
         self.session_entries = []  # Store current session entries
+        self._default_rates = {}  # distributor_id -> default purchase rate
+        self._rate_cache = {}  # (distributor_id, product_id) -> product-specific or looked-up rate
         self.init_ui()
 
     def init_ui(self):
@@ -83,18 +89,38 @@ class PurchaseWindow(QWidget):
         header_layout.addWidget(report_btn)
         layout.addLayout(header_layout)
 
-        # Sale entries table
-        self.table = QTableWidget()
-        self.table.setColumnCount(9)
-        self.table.setHorizontalHeaderLabels([
-            "#", "Ticket", "Series", "From No.", "To No.", "Qty", "Rate", "Amount", ""
-        ])
+        # Purchase entries table (editors are created only for the cell being edited)
+        self.model = EntryRowsModel('product_id', self)
+        self.model.totalsChanged.connect(self.update_totals)
+        self.model.ticketChanged.connect(self.on_ticket_changed)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(QHeaderView.Fixed)
         header.setSectionResizeMode(self.COL_TICKET, QHeaderView.Stretch)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setEditTriggers(
+            QAbstractItemView.CurrentChanged | QAbstractItemView.DoubleClicked |
+            QAbstractItemView.SelectedClicked | QAbstractItemView.EditKeyPressed |
+            QAbstractItemView.AnyKeyPressed
+        )
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
         self.table.verticalHeader().setVisible(False)
         self.table.setAlternatingRowColors(True)
+
+        self.ticket_delegate = TicketDelegate(self)
+        self.series_delegate = SeriesDelegate(self)
+        self.range_delegate = SpinDelegate(self)
+        self.rate_delegate = SpinDelegate(self, decimals=2)
+        self.remove_delegate = RemoveButtonDelegate(self)
+        self.table.setItemDelegateForColumn(self.COL_TICKET, self.ticket_delegate)
+        self.table.setItemDelegateForColumn(self.COL_SERIES, self.series_delegate)
+        self.table.setItemDelegateForColumn(self.COL_FROM, self.range_delegate)
+        self.table.setItemDelegateForColumn(self.COL_TO, self.range_delegate)
+        self.table.setItemDelegateForColumn(self.COL_RATE, self.rate_delegate)
+        self.table.setItemDelegateForColumn(self.COL_ACTIONS, self.remove_delegate)
+        for delegate in (self.ticket_delegate, self.series_delegate, self.range_delegate, self.rate_delegate):
+            delegate.closeEditor.connect(self.on_editor_closed)
+        self.remove_delegate.removeClicked.connect(self.remove_row)
         layout.addWidget(self.table)
 
         # Totals
@@ -139,19 +165,36 @@ class PurchaseWindow(QWidget):
         """Load distributors and tickets (products)."""
         session = db_manager.get_session()
         try:
-            # Distributors
+            # Distributors (signals blocked so each addItem doesn't re-price every row)
+            current_dist = self.distributor_combo.currentData()
+            self.distributor_combo.blockSignals(True)
             self.distributor_combo.clear()
-            for dist in session.query(Distributor).all():
-                self.distributor_combo.addItem(dist.name, dist.id)
-
-            # Products (Tickets)
-            self.products = session.query(Product).all()
+            for dist_id, dist_name in session.query(Distributor.id, Distributor.name).all():
+                self.distributor_combo.addItem(dist_name, dist_id)
+            idx = self.distributor_combo.findData(current_dist)
+            if idx >= 0:
+                self.distributor_combo.setCurrentIndex(idx)
+            self.distributor_combo.blockSignals(False)
+
+            # Products (Tickets) as (id, name) rows
+            self.products = session.query(Product.id, Product.name).all()
+            self.model.set_products(self.products)
+            self.product_model.clear()
+            for pid, pname in self.products:
+                item = QStandardItem(pname)
+                item.setData(pid, Qt.UserRole)
+                self.product_model.appendRow(item)
         finally:
             session.close()
 
-        # Restore session entries if they exist
+        # Seed all rates in one go so re-pricing rows needs no DB round-trips
+        self._default_rates, self._rate_cache = PricingService.get_all_purchase_rates()
+
+        # Restore session entries if they exist, otherwise re-price rows once
         if self.session_entries:
             self.restore_session_entries()
+        else:
+            self.on_distributor_changed()
         
         # Auto-focus first field
         self.distributor_combo.setFocus()
@@ -168,403 +211,229 @@ class PurchaseWindow(QWidget):
         dialog.exec()
 
     def add_row(self):
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-
-        # Column: #
-        idx_item = QTableWidgetItem(str(row + 1))
-        idx_item.setTextAlignment(Qt.AlignCenter)
-        self.table.setItem(row, self.COL_INDEX, idx_item)
-
-        # Column: Ticket (Product)
-        ticket_combo = QComboBox()
-        for p in self.products:
-            ticket_combo.addItem(p.name, p.id)
-        ticket_combo.currentIndexChanged.connect(lambda _=None, r=row: self.on_ticket_changed(r))
-        self.table.setCellWidget(row, self.COL_TICKET, ticket_combo)
-
-        # Column: Series (digits + letter, auto uppercase)
-        series_edit = QLineEdit()
-        validator = QRegularExpressionValidator(QRegularExpression(r"^\d+[A-Za-z]$"))
-        series_edit.setValidator(validator)
-        series_edit.textChanged.connect(lambda _=None, r=row: self.on_series_changed(r))
-        self.table.setCellWidget(row, self.COL_SERIES, series_edit)
-
-        # Columns: From No. / To No.
-        from_spin = QSpinBox()
-        from_spin.setRange(0, 999999)
-        to_spin = QSpinBox()
-        to_spin.setRange(0, 999999)
-        to_spin.setKeyboardTracking(False)  # Only update on edit finish
-        from_spin.valueChanged.connect(lambda _=None, r=row: self.on_range_changed(r))
-        to_spin.valueChanged.connect(lambda _=None, r=row: self.on_to_changed(r))
-        to_spin.installEventFilter(self)
-        self.table.setCellWidget(row, self.COL_FROM, from_spin)
-        self.table.setCellWidget(row, self.COL_TO, to_spin)
-
-        # Column: Qty (read-only)
-        qty_item = QTableWidgetItem("0")
-        qty_item.setFlags(qty_item.flags() & ~Qt.ItemIsEditable)
-        qty_item.setTextAlignment(Qt.AlignCenter)
-        self.table.setItem(row, self.COL_QTY, qty_item)
-
-        # Column: Rate (auto from distributor+ticket, editable)
-        rate_spin = QDoubleSpinBox()
-        rate_spin.setRange(0.00, 999999)
-        rate_spin.setDecimals(2)
-        rate_spin.valueChanged.connect(lambda _=None, r=row: self.recalc_row_amount(r))
-        rate_spin.installEventFilter(self)  # Install event filter for Enter key
-        self.table.setCellWidget(row, self.COL_RATE, rate_spin)
-
-        # Column: Amount (read-only)
-        amt_item = QTableWidgetItem("₹ 0.00")
-        amt_item.setFlags(amt_item.flags() & ~Qt.ItemIsEditable)
-        amt_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-        self.table.setItem(row, self.COL_AMOUNT, amt_item)
-
-        # Column: Actions (Remove)
-        rm_btn = QPushButton("Remove")
-        rm_btn.clicked.connect(lambda _=None, r=row: self.remove_row(r))
-        self.table.setCellWidget(row, self.COL_ACTIONS, rm_btn)
+        """Append a row for the first ticket, priced for the current distributor."""
+        product_id = self.products[0][0] if self.products else None
+        row = self.model.append_row(product_id)
 
         # Initialize rate based on current distributor and ticket
         self.on_ticket_changed(row)
+        return row
 
-    def on_series_changed(self, row):
-        edit = self.table.cellWidget(row, self.COL_SERIES)
-        if not edit:
+    def edit_cell(self, row, column):
+        """Move the cursor to a cell and open its editor."""
+        index = self.model.index(row, column)
+        if not index.isValid():
             return
-        text = edit.text()
-        if text:
-            # Auto uppercase letters
-            upper = ''.join([ch.upper() if ch.isalpha() else ch for ch in text])
-            if upper != text:
-                old_block = edit.blockSignals(True)
-                edit.setText(upper)
-                edit.blockSignals(old_block)
-
-    def on_to_changed(self, row):
-        """Handle To No. changes with smart auto-completion."""
-        from_spin = self.table.cellWidget(row, self.COL_FROM)
-        to_spin = self.table.cellWidget(row, self.COL_TO)
-        if not (from_spin and to_spin):
+        self.table.setFocus()
+        self.table.setCurrentIndex(index)
+        # The CurrentChanged trigger may already have opened the editor
+        if self.table.indexWidget(index) is None:
+            self.table.edit(index)
+
+    def on_editor_closed(self, editor, hint):
+        """Enter moves Ticket -> Series -> From -> To -> Rate; Enter on Rate validates and adds a row."""
+        if hint != QAbstractItemDelegate.SubmitModelCache:
             return
-        
-        from_val = from_spin.value()
-        to_val = to_spin.value()
-        
-        # Smart auto-completion: if to_val is shorter than from_val, auto-complete
-        if from_val > 0 and to_val > 0:
-            from_str = str(from_val)
-            to_str = str(to_val)
-            
-            # If to_val has fewer digits, auto-complete from from_val
-            if len(to_str) < len(from_str):
-                # Replace last N digits of from_val with to_val
-                prefix = from_str[:-len(to_str)]
-                completed = int(prefix + to_str)
-                if completed != to_val:
-                    to_spin.blockSignals(True)
-                    to_spin.setValue(completed)
-                    to_spin.blockSignals(False)
-        
-        self.on_range_changed(row)
-    
-    def on_range_changed(self, row):
-        from_spin = self.table.cellWidget(row, self.COL_FROM)
-        to_spin = self.table.cellWidget(row, self.COL_TO)
-        qty_item = self.table.item(row, self.COL_QTY)
-        ticket_combo = self.table.cellWidget(row, self.COL_TICKET)
-        if not (from_spin and to_spin and qty_item and ticket_combo):
+        index = self.table.currentIndex()
+        r = index.row()
+        if index.column() != self.COL_RATE:
+            columns = EntryRowsModel.EDITABLE_COLUMNS
+            self.edit_cell(r, columns[columns.index(index.column()) + 1])
             return
-        f = from_spin.value()
-        t = to_spin.value()
-        base_qty = t - f + 1 if t >= f and f > 0 and t > 0 else 0
-        
-        # Extract ticket multiplier from ticket name (e.g., M5 -> 5, D10 -> 10, E200 -> 200)
-        ticket_name = ticket_combo.currentText()
-        multiplier = self.extract_ticket_multiplier(ticket_name)
-        
-        qty = base_qty * multiplier
-        qty_item.setText(str(qty))
-        self.recalc_row_amount(row)
-    
-    def extract_ticket_multiplier(self, ticket_name):
-        """Extract numeric multiplier from ticket name (e.g., 'M5' -> 5, 'D10' -> 10)."""
-        import re
-        match = re.search(r'\d+', ticket_name)
-        return int(match.group()) if match else 1
-    
-    def is_row_empty(self, row):
-        """Check if a row is completely empty (no data entered)."""
-        from_spin = self.table.cellWidget(row, self.COL_FROM)
-        to_spin = self.table.cellWidget(row, self.COL_TO)
-        
-        # Row is empty if from/to are both at default value (0)
-        if not from_spin or not to_spin:
-            return True
-        
-        return from_spin.value() == 0 and to_spin.value() == 0
+
+        # Validate current row
+        ok, err = self.validate_row(r)
+        if ok:
+            # Create new row and focus ticket
+            self.add_row()
+            self.edit_cell(r + 1, self.COL_TICKET)
+        else:
+            # Show validation error
+            QMessageBox.warning(self, "Validation Error", f"Row {r+1}: {err}")
 
     def on_ticket_changed(self, row):
         # When ticket or distributor changes, auto-populate rate
-        ticket_combo = self.table.cellWidget(row, self.COL_TICKET)
-        rate_spin = self.table.cellWidget(row, self.COL_RATE)
         dist_id = self.distributor_combo.currentData()
-        if ticket_combo is None or rate_spin is None or not dist_id:
+        product_id = self.model.row(row)['product_id']
+        if not dist_id or not product_id:
             return
-        product_id = ticket_combo.currentData()
-        if product_id:
+        key = (dist_id, product_id)
+        # Product-specific price first, then the distributor's default rate
+        rate = self._rate_cache.get(key)
+        if rate is None:
+            rate = self._default_rates.get(dist_id)
+        if rate is None:
             rate = PricingService.get_purchase_rate(dist_id, product_id)
-            old = rate_spin.blockSignals(True)
-            rate_spin.setValue(float(rate) if rate is not None else 0.0)
-            rate_spin.blockSignals(old)
-        # Recalculate quantity with new ticket multiplier
-        self.on_range_changed(row)
-        self.recalc_row_amount(row)
-
-    def recalc_row_amount(self, row):
-        qty_item = self.table.item(row, self.COL_QTY)
-        rate_spin = self.table.cellWidget(row, self.COL_RATE)
-        amt_item = self.table.item(row, self.COL_AMOUNT)
-        if not (qty_item and rate_spin and amt_item):
-            return
-        try:
-            qty = int(qty_item.text())
-        except ValueError:
-            qty = 0
-        amount = qty * rate_spin.value()
-        amt_item.setText(f"₹ {amount:,.2f}")
-        self.update_totals()
+            self._rate_cache[key] = rate
+        self.model.setData(self.model.index(row, self.COL_RATE), float(rate) if rate is not None else 0.0)
 
     def remove_row(self, row):
-        if row < 0 or row >= self.table.rowCount():
+        if row < 0 or row >= self.model.rowCount():
             return
-        self.table.removeRow(row)
-        # Renumber indexes
-        for r in range(self.table.rowCount()):
-            item = self.table.item(r, self.COL_INDEX)
-            if item:
-                item.setText(str(r + 1))
-        self.update_totals()
+        self.model.removeRow(row)
 
     def update_totals(self):
-        total_qty = 0
-        total_amount = 0.0
-        for r in range(self.table.rowCount()):
-            qty_item = self.table.item(r, self.COL_QTY)
-            amt_item = self.table.item(r, self.COL_AMOUNT)
-            if qty_item:
-                try:
-                    total_qty += int(qty_item.text())
-                except ValueError:
-                    pass
-            if amt_item:
-                txt = amt_item.text().replace("₹", "").replace(",", "").strip()
-                try:
-                    total_amount += float(txt)
-                except ValueError:
-                    pass
-        self.total_qty_label.setText(f"Total Qty: {total_qty}")
-        self.total_amount_label.setText(f"₹ {total_amount:,.2f}")
+        self.total_qty_label.setText(f"Total Qty: {self.model.total_qty}")
+        self.total_amount_label.setText(f"₹ {self.model.total_amount:,.2f}")
 
     def on_distributor_changed(self):
         # Refresh rate for all rows based on new distributor
-        for r in range(self.table.rowCount()):
-            self.on_ticket_changed(r)
+        rows = self.model.rowCount()
+        if not rows:
+            return
+        # Re-price silently, then notify the view and totals once instead of per row
+        self.model.blockSignals(True)
+        try:
+            for r in range(rows):
+                self.on_ticket_changed(r)
+        finally:
+            self.model.blockSignals(False)
+        self.model.dataChanged.emit(self.model.index(0, self.COL_QTY), self.model.index(rows - 1, self.COL_AMOUNT))
+        self.update_totals()
 
     def validate_row(self, row):
-        ticket_combo = self.table.cellWidget(row, self.COL_TICKET)
-        series_edit = self.table.cellWidget(row, self.COL_SERIES)
-        from_spin = self.table.cellWidget(row, self.COL_FROM)
-        to_spin = self.table.cellWidget(row, self.COL_TO)
-        rate_spin = self.table.cellWidget(row, self.COL_RATE)
+        entry = self.model.row(row)
+        ticket_id = entry['product_id']
+        from_no = entry['from_no']
+        to_no = entry['to_no']
 
-        if ticket_combo is None or ticket_combo.currentData() is None:
+        # In-memory checks first; the duplicate check below hits the database
+        if ticket_id is None:
             return False, "Please select a ticket."
         # Series can be blank - skip validation
-        if from_spin is None or to_spin is None:
-            return False, "From/To numbers are required."
-        if to_spin.value() < from_spin.value() or from_spin.value() <= 0:
+        if to_no < from_no or from_no <= 0:
             return False, "Invalid range: To No. must be >= From No., both > 0."
-        if rate_spin is None or rate_spin.value() <= 0:
+        if entry['rate'] <= 0:
             return False, "Rate must be greater than 0."
-        
+
         # Check for duplicate entry in existing purchases for same draw date
-        ticket_id = ticket_combo.currentData()
-        from_no = from_spin.value()
-        to_no = to_spin.value()
         draw_date = self.date_edit.date().toPython()
-        
+
         is_duplicate, err = self.check_duplicate_purchase(ticket_id, from_no, to_no, draw_date)
         if is_duplicate:
             return False, err
-        
+
         return True, None
-    
+
     def check_duplicate_purchase(self, ticket_id, from_no, to_no, draw_date):
         """Check if this purchase range already exists for the same draw date and ticket."""
-        session = db_manager.get_session()
-        try:
-            from sqlalchemy import func
-            import re
-            
-            # Get the ticket name
-            product = session.query(Product).filter(Product.id == ticket_id).first()
-            if not product:
-                return False, None
-            
-            ticket_name = product.name
-            
-            # Get all purchases for this draw date
-            purchases = session.query(Purchase).filter(
-                func.date(Purchase.purchase_date) == draw_date
-            ).all()
-            
-            # Pattern to parse entries
-            pattern = r'^(.+?)\s*\|\s*Series\s+(\w*)\s*\|\s*(\d+)-(\d+)\s*\|'
-            
-            for purchase in purchases:
-                if purchase.notes:
-                    for line in purchase.notes.split('\n'):
-                        match = re.match(pattern, line)
-                        if match:
-                            line_ticket = match.group(1).strip()
-                            existing_from = int(match.group(3))
-                            existing_to = int(match.group(4))
-                            
-                            # Check if same ticket and overlapping range
-                            if line_ticket == ticket_name:
-                                # Check for any overlap
-                                if not (to_no < existing_from or from_no > existing_to):
-                                    return True, f"Range {from_no}-{to_no} overlaps with existing purchase {existing_from}-{existing_to} for {ticket_name} on {draw_date.strftime('%d-%m-%y')}"
-            
+        # Get the ticket name (already loaded by refresh_data)
+        ticket_name = self.model.product_name(ticket_id)
+        if not ticket_name:
             return False, None
-        finally:
-            session.close()
+
+        # Ranges are matched by product id, so purchases of a since-renamed ticket still count
+        with db_manager.session_scope() as session:
+            overlap = session.query(PurchaseRange.from_no, PurchaseRange.to_no).filter(
+                PurchaseRange.draw_date == draw_date,
+                PurchaseRange.product_id == ticket_id,
+                PurchaseRange.from_no <= to_no,
+                PurchaseRange.to_no >= from_no
+            ).order_by(PurchaseRange.id).first()
+
+        if overlap:
+            existing_from, existing_to = overlap
+            return True, f"Range {from_no}-{to_no} overlaps with existing purchase {existing_from}-{existing_to} for {ticket_name} on {draw_date.strftime('%d-%m-%y')}"
+        return False, None
 
     def save_current_session(self):
         """Save current table entries to session storage."""
-        self.session_entries = []
-        for r in range(self.table.rowCount()):
-            ticket_combo = self.table.cellWidget(r, self.COL_TICKET)
-            series_edit = self.table.cellWidget(r, self.COL_SERIES)
-            from_spin = self.table.cellWidget(r, self.COL_FROM)
-            to_spin = self.table.cellWidget(r, self.COL_TO)
-            rate_spin = self.table.cellWidget(r, self.COL_RATE)
-            
-            if ticket_combo and series_edit and from_spin and to_spin and rate_spin:
-                entry = {
-                    'ticket_id': ticket_combo.currentData(),
-                    'series': series_edit.text(),
-                    'from_no': from_spin.value(),
-                    'to_no': to_spin.value(),
-                    'rate': rate_spin.value()
-                }
-                self.session_entries.append(entry)
-    
+        self.session_entries = [
+            {
+                'ticket_id': entry['product_id'],
+                'series': entry['series'],
+                'from_no': entry['from_no'],
+                'to_no': entry['to_no'],
+                'rate': entry['rate']
+            }
+            for entry in self.model.rows()
+        ]
+
     def restore_session_entries(self):
         """Restore session entries to table."""
-        self.table.setRowCount(0)
-        for entry in self.session_entries:
-            row = self.table.rowCount()
-            self.add_row()
-            
-            # Restore values
-            ticket_combo = self.table.cellWidget(row, self.COL_TICKET)
-            series_edit = self.table.cellWidget(row, self.COL_SERIES)
-            from_spin = self.table.cellWidget(row, self.COL_FROM)
-            to_spin = self.table.cellWidget(row, self.COL_TO)
-            rate_spin = self.table.cellWidget(row, self.COL_RATE)
-            
-            if ticket_combo:
-                idx = ticket_combo.findData(entry['ticket_id'])
-                if idx >= 0:
-                    ticket_combo.setCurrentIndex(idx)
-            if series_edit:
-                series_edit.setText(entry['series'])
-            if from_spin:
-                from_spin.setValue(entry['from_no'])
-            if to_spin:
-                to_spin.setValue(entry['to_no'])
-            if rate_spin:
-                rate_spin.setValue(entry['rate'])
-        
-        self.update_totals()
-    
+        # Rates come from the entries, so no pricing lookups are needed
+        self.model.set_rows([
+            {
+                'product_id': entry['ticket_id'],
+                'series': entry['series'],
+                'from_no': entry['from_no'],
+                'to_no': entry['to_no'],
+                'rate': entry['rate']
+            }
+            for entry in self.session_entries
+        ])
+
     def has_unsaved_entries(self):
         """Check if there are any valid unsaved entries and table is not locked."""
         # If table is disabled, entries are already saved
         if not self.table.isEnabled():
             return False
-        
+
         # Check if at least one row has valid data
-        for r in range(self.table.rowCount()):
-            if not self.is_row_empty(r):
+        for r in range(self.model.rowCount()):
+            if not self.model.is_row_empty(r):
                 return True
         return False
-    
+
     def clear_session(self):
         """Clear session entries (F9 handler)."""
         self.session_entries = []
-        self.table.setRowCount(0)
-        self.update_totals()
+        self.model.clear()
         # Unlock and restore table
         self.table.setEnabled(True)
         self.table.setStyleSheet("")
         self.distributor_combo.setEnabled(True)
         self.date_edit.setEnabled(True)
         self.distributor_combo.setFocus()
-    
+
     def save_purchase(self):
         if not self.distributor_combo.currentData():
             QMessageBox.warning(self, "Validation Error", "Please select a distributor.")
             return
-        if self.table.rowCount() == 0:
+        if self.model.rowCount() == 0:
             QMessageBox.warning(self, "Validation Error", "Please add at least one entry.")
             return
 
         items = []
         notes_rows = []
         rows_to_remove = []  # Track empty rows to remove
-        
-        for r in range(self.table.rowCount()):
+
+        for r in range(self.model.rowCount()):
             # Skip empty rows but track them for removal
-            if self.is_row_empty(r):
+            if self.model.is_row_empty(r):
                 rows_to_remove.append(r)
                 continue
-                
+
             ok, err = self.validate_row(r)
             if not ok:
                 QMessageBox.warning(self, "Validation Error", f"Row {r+1}: {err}")
                 return
-            ticket_combo = self.table.cellWidget(r, self.COL_TICKET)
-            series_edit = self.table.cellWidget(r, self.COL_SERIES)
-            from_spin = self.table.cellWidget(r, self.COL_FROM)
-            to_spin = self.table.cellWidget(r, self.COL_TO)
-            rate_spin = self.table.cellWidget(r, self.COL_RATE)
-            qty_item = self.table.item(r, self.COL_QTY)
-
-            qty = int(qty_item.text()) if qty_item else 0
+            entry = self.model.row(r)
+
+            qty = entry['qty']
             items.append({
-                'product_id': ticket_combo.currentData(),
+                'product_id': entry['product_id'],
                 'quantity': qty,
-                'rate': float(rate_spin.value())
+                'rate': entry['rate'],
+                'amount': entry['amount'],
+                'series': entry['series'],
+                'from_no': entry['from_no'],
+                'to_no': entry['to_no']
             })
 
             notes_rows.append(
-                f"{ticket_combo.currentText()} | Series {series_edit.text()} | {from_spin.value()}-{to_spin.value()} | Qty {qty} @ {rate_spin.value():.2f}"
+                f"{self.model.product_name(entry['product_id'])} | Series {entry['series']} | {entry['from_no']}-{entry['to_no']} | Qty {qty} @ {entry['rate']:.2f}"
             )
-        
+
         # Check if we have any valid entries after skipping empty rows
         if not items:
             QMessageBox.warning(self, "Validation Error", "Please add at least one valid entry.")
             return
-        
+
         # Ask for confirmation before saving
         reply = QMessageBox.question(
-            self, 
-            "Confirm Save", 
+            self,
+            "Confirm Save",
             f"Do you want to save {len(items)} purchase entry(ies)?",
             QMessageBox.Yes | QMessageBox.No,
             QMessageBox.Yes  # Default focus on Yes
@@ -585,11 +454,17 @@ class PurchaseWindow(QWidget):
             distributor_id, purchase_date, items, None, notes
         )
         if success:
-            # Remove empty rows before locking
-            for r in reversed(rows_to_remove):
-                self.table.removeRow(r)
-            self.update_totals()
-            
+            # Remove empty rows before locking (one repaint for the whole batch)
+            self.table.setUpdatesEnabled(False)
+            try:
+                for r in reversed(rows_to_remove):
+                    self.model.removeRow(r)
+            finally:
+                self.table.setUpdatesEnabled(True)
+            # Rates may have been edited in the control panel meanwhile
+            self._default_rates.clear()
+            self._rate_cache.clear()
+
             QMessageBox.information(self, "Success", f"Purchase saved successfully!\n{message}")
             # Lock the table and fade it
             self.table.setEnabled(False)
@@ -600,27 +475,16 @@ class PurchaseWindow(QWidget):
             QMessageBox.critical(self, "Error", message)
 
     def clear_form(self):
-        self.date_edit.setDate(QDate.currentDate())
-        self.table.setRowCount(0)
-        self.update_totals()
+        self.table.setUpdatesEnabled(False)
+        try:
+            self.date_edit.setDate(QDate.currentDate())
+            self.model.clear()
+        finally:
+            self.table.setUpdatesEnabled(True)
         self.distributor_combo.setFocus()
     
-    def keyPressEvent(self, event):
-        """Handle Enter key to move between fields."""
-        from PySide6.QtGui import QKeyEvent
-        
-        if event.key() in (Qt.Key_Return, Qt.Key_Enter):
-            # Move to next focusable widget
-            self.focusNextChild()
-            event.accept()
-        else:
-            super().keyPressEvent(event)
-    
     def eventFilter(self, obj, event):
-        """Filter events to handle Enter on To spinbox, Rate spinbox, date edit, and F9/F10 globally."""
-        from PySide6.QtCore import QEvent
-        from PySide6.QtGui import QKeyEvent
-        
+        """Filter events to handle Enter on the date edit and F9/F10 globally."""
         # Handle F9, F10 and F6 globally (regardless of which widget has focus)
         if event.type() == QEvent.KeyPress:
             if event.key() == Qt.Key_F9:
@@ -636,62 +500,15 @@ class PurchaseWindow(QWidget):
         
         # Check if it's Enter key on date edit when table is empty
         if obj == self.date_edit and event.type() == QEvent.KeyPress:
-            if event.key() in (Qt.Key_Return, Qt.Key_Enter) and self.table.rowCount() == 0:
+            if event.key() in (Qt.Key_Return, Qt.Key_Enter) and self.model.rowCount() == 0:
                 self.add_row()
-                ticket_combo = self.table.cellWidget(0, self.COL_TICKET)
-                if ticket_combo:
-                    ticket_combo.setFocus()
+                self.edit_cell(0, self.COL_TICKET)
                 return True
         
-        # Check if it's Enter key on Rate spinbox
-        if event.type() == QEvent.KeyPress:
-            key_event = event
-            if key_event.key() in (Qt.Key_Return, Qt.Key_Enter):
-                # Find which row this rate spinbox belongs to
-                for r in range(self.table.rowCount()):
-                    rate_spin = self.table.cellWidget(r, self.COL_RATE)
-                    if obj == rate_spin:
-                        # Interpret the current value
-                        rate_spin.interpretText()
-                        
-                        # Validate current row
-                        ok, err = self.validate_row(r)
-                        if ok:
-                            # Create new row and focus ticket
-                            self.add_row()
-                            next_ticket = self.table.cellWidget(r + 1, self.COL_TICKET)
-                            if next_ticket:
-                                next_ticket.setFocus()
-                        else:
-                            # Show validation error
-                            QMessageBox.warning(self, "Validation Error", f"Row {r+1}: {err}")
-                        
-                        return True
-        
-        # Check if it's Enter key on To spinbox
-        if event.type() == QEvent.KeyPress:
-            key_event = event
-            if key_event.key() in (Qt.Key_Return, Qt.Key_Enter):
-                # Find which row this spinbox belongs to
-                for r in range(self.table.rowCount()):
-                    to_spin = self.table.cellWidget(r, self.COL_TO)
-                    if obj == to_spin:
-                        # Interpret the current value from line edit
-                        to_spin.interpretText()
-                        
-                        # Move focus to rate spinbox in same row
-                        rate_spin = self.table.cellWidget(r, self.COL_RATE)
-                        if rate_spin:
-                            rate_spin.setFocus()
-                            rate_spin.selectAll()
-                        
-                        return True
-        
         return super().eventFilter(obj, event)
     
     def keyPressEvent(self, event):
         """Handle Enter key to move between fields."""
-        from PySide6.QtGui import QKeyEvent
         if event.key() in (Qt.Key_Return, Qt.Key_Enter):
             # Move to next focusable widget
             self.focusNextChild()
@@ -1,11 +1,20 @@
 """Quick View Dialog for accessing other screens in a popup."""
+import importlib
 from PySide6.QtWidgets import (
-    QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QComboBox
+    QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QComboBox, QStackedWidget
 )
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QShortcut, QKeySequence
 
 
+# Screen key -> (module, class); modules are imported on first use only
+SCREEN_CLASSES = {
+    "purchase": ("ui.purchase_window", "PurchaseWindow"),
+    "sale": ("ui.sale_window", "SaleWindow"),
+    "stock": ("ui.stock_window", "StockWindow"),
+}
+
+
 class QuickViewDialog(QDialog):
     """Dialog for quick access to other screens."""
     
@@ -13,6 +22,7 @@ class QuickViewDialog(QDialog):
         super().__init__(parent)
         self.current_screen = current_screen
         self.current_widget = None
+        self._screens = {}  # screen key -> widget, built once per dialog
         self.init_ui()
         
     def init_ui(self):
@@ -60,9 +70,9 @@ class QuickViewDialog(QDialog):
         
         layout.addLayout(header_layout)
         
-        # Container for the screen widget
-        self.screen_container = QVBoxLayout()
-        layout.addLayout(self.screen_container)
+        # Container for the screen widgets
+        self.stack = QStackedWidget()
+        layout.addWidget(self.stack)
         
         # Load initial screen
         if self.screen_combo.count() > 0:
@@ -73,36 +83,32 @@ class QuickViewDialog(QDialog):
         esc_shortcut.activated.connect(self.close)
         
     def on_screen_changed(self, index):
-        """Load the selected screen."""
-        # Remove current widget if any
-        if self.current_widget:
-            self.screen_container.removeWidget(self.current_widget)
-            self.current_widget.deleteLater()
-            self.current_widget = None
-        
+        """Show the selected screen, building it the first time it is selected."""
         screen_key = self.screen_combo.currentData()
         if not screen_key:
             return
         
-        # Import and create the appropriate screen
-        if screen_key == "purchase":
-            from ui.purchase_window import PurchaseWindow
-            self.current_widget = PurchaseWindow()
-        elif screen_key == "sale":
-            from ui.sale_window import SaleWindow
-            self.current_widget = SaleWindow()
-        elif screen_key == "stock":
-            from ui.stock_window import StockWindow
-            self.current_widget = StockWindow()
-        
-        if self.current_widget:
-            self.screen_container.addWidget(self.current_widget)
+        widget = self._screens.get(screen_key)
+        if widget is None:
+            if screen_key not in SCREEN_CLASSES:
+                return
+            # Each screen is built once per dialog, so one import_module lookup per screen is enough
+            module_name, class_name = SCREEN_CLASSES[screen_key]
+            widget = getattr(importlib.import_module(module_name), class_name)()
+            
+            self.stack.addWidget(widget)
+            self._screens[screen_key] = widget
             # Refresh data for the screen
-            if hasattr(self.current_widget, 'refresh_data'):
-                self.current_widget.refresh_data()
+            if hasattr(widget, 'refresh_data'):
+                widget.refresh_data()
+        
+        self.current_widget = widget
+        self.stack.setCurrentWidget(widget)
     
     def closeEvent(self, event):
         """Clean up when dialog is closed."""
-        if self.current_widget:
-            self.current_widget.deleteLater()
+        for widget in self._screens.values():
+            widget.deleteLater()
+        self._screens.clear()
+        self.current_widget = None
         super().closeEvent(event)
@@ -14,6 +14,7 @@ class ReportsWindow(QWidget):
     
     def __init__(self):
         super().__init__()
+        self._default_from = QDate.currentDate().addMonths(-1)  # Shared default start date
         self.init_ui()
     
     def init_ui(self):
@@ -30,7 +31,7 @@ class ReportsWindow(QWidget):
         purchase_layout = QFormLayout()
         
         self.purchase_start_date = QDateEdit()
-        self.purchase_start_date.setDate(QDate.currentDate().addMonths(-1))
+        self.purchase_start_date.setDate(self._default_from)
         self.purchase_start_date.setCalendarPopup(True)
         purchase_layout.addRow("From Date:", self.purchase_start_date)
         
@@ -58,7 +59,7 @@ class ReportsWindow(QWidget):
         sale_layout = QFormLayout()
         
         self.sale_start_date = QDateEdit()
-        self.sale_start_date.setDate(QDate.currentDate().addMonths(-1))
+        self.sale_start_date.setDate(self._default_from)
         self.sale_start_date.setCalendarPopup(True)
         sale_layout.addRow("From Date:", self.sale_start_date)
         
@@ -94,14 +95,14 @@ class ReportsWindow(QWidget):
         session = db_manager.get_session()
         try:
             # Load distributors
-            distributors = session.query(Distributor).all()
-            for dist in distributors:
-                self.purchase_distributor_combo.addItem(dist.name, dist.id)
+            distributors = session.query(Distributor.id, Distributor.name).all()
+            for dist_id, dist_name in distributors:
+                self.purchase_distributor_combo.addItem(dist_name, dist_id)
             
             # Load parties
-            parties = session.query(Party).all()
-            for party in parties:
-                self.sale_party_combo.addItem(party.name, party.id)
+            parties = session.query(Party.id, Party.name).all()
+            for party_id, party_name in parties:
+                self.sale_party_combo.addItem(party_name, party_id)
         finally:
             session.close()
     
@@ -111,27 +112,36 @@ class ReportsWindow(QWidget):
         end_date = self.purchase_end_date.date().toPython()
         distributor_id = self.purchase_distributor_combo.currentData()
         
-        # Get report data
-        report_data = ReportService.get_purchase_report(start_date, end_date, distributor_id)
-        
-        if not report_data:
+        # Cheap existence check; its session is closed before the dialog opens
+        if not ReportService.has_purchase_records(start_date, end_date, distributor_id):
             QMessageBox.information(self, "No Data", "No purchase records found for the selected criteria.")
             return
         
-        # Ask for save location
+        # Ask for save location before streaming, so no report query is open while the dialog is up
         file_name, _ = QFileDialog.getSaveFileName(
             self,
             "Save Purchase Report",
             f"Purchase_Report_{datetime.now().strftime('%Y%m%d')}.pdf",
             "PDF Files (*.pdf)"
         )
+        if not file_name:
+            return
+        
+        # Get report data (streamed)
+        report_data = ReportService.get_purchase_report(start_date, end_date, distributor_id)
+        error = None
+        try:
+            ReportService.generate_purchase_pdf(report_data, file_name, start_date, end_date)
+        except Exception as e:
+            error = e
+        finally:
+            # Release the report's session before any message box opens
+            report_data.close()
         
-        if file_name:
-            try:
-                ReportService.generate_purchase_pdf(report_data, file_name, start_date, end_date)
-                QMessageBox.information(self, "Success", f"Purchase report generated successfully!\n\nSaved to: {file_name}")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Error generating PDF: {str(e)}")
+        if error is not None:
+            QMessageBox.critical(self, "Error", f"Error generating PDF: {str(error)}")
+        else:
+            QMessageBox.information(self, "Success", f"Purchase report generated successfully!\n\nSaved to: {file_name}")
     
     def generate_sale_pdf(self):
         """Generate sale report PDF."""
@@ -139,24 +149,33 @@ class ReportsWindow(QWidget):
         end_date = self.sale_end_date.date().toPython()
         party_id = self.sale_party_combo.currentData()
         
-        # Get report data
-        report_data = ReportService.get_sale_report(start_date, end_date, party_id)
-        
-        if not report_data:
+        # Cheap existence check; its session is closed before the dialog opens
+        if not ReportService.has_sale_records(start_date, end_date, party_id):
             QMessageBox.information(self, "No Data", "No sale records found for the selected criteria.")
             return
         
-        # Ask for save location
+        # Ask for save location before streaming, so no report query is open while the dialog is up
         file_name, _ = QFileDialog.getSaveFileName(
             self,
             "Save Sale Report",
             f"Sale_Report_{datetime.now().strftime('%Y%m%d')}.pdf",
             "PDF Files (*.pdf)"
         )
+        if not file_name:
+            return
+        
+        # Get report data (streamed)
+        report_data = ReportService.get_sale_report(start_date, end_date, party_id)
+        error = None
+        try:
+            ReportService.generate_sale_pdf(report_data, file_name, start_date, end_date)
+        except Exception as e:
+            error = e
+        finally:
+            # Release the report's session before any message box opens
+            report_data.close()
         
-        if file_name:
-            try:
-                ReportService.generate_sale_pdf(report_data, file_name, start_date, end_date)
-                QMessageBox.information(self, "Success", f"Sale report generated successfully!\n\nSaved to: {file_name}")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Error generating PDF: {str(e)}")
+        if error is not None:
+            QMessageBox.critical(self, "Error", f"Error generating PDF: {str(error)}")
+        else:
+            QMessageBox.information(self, "Success", f"Sale report generated successfully!\n\nSaved to: {file_name}")
@@ -1,35 +1,54 @@
 """Sale window for ticket-based sales with ranges."""
+import re
+from contextlib import contextmanager
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
-    QComboBox, QTableWidget, QTableWidgetItem, QDateEdit,
-    QLineEdit, QMessageBox, QDoubleSpinBox, QHeaderView, QSpinBox
+    QComboBox, QTableView, QDateEdit, QAbstractItemView, QAbstractItemDelegate,
+    QMessageBox, QHeaderView
 )
-from PySide6.QtCore import Qt, QDate, QRegularExpression
-from PySide6.QtGui import QRegularExpressionValidator, QShortcut, QKeySequence
-from datetime import date
-from database.models import Party, Product, Purchase, Sale
+from PySide6.QtCore import Qt, QDate, QEvent
+from PySide6.QtGui import QShortcut, QKeySequence, QStandardItemModel, QStandardItem
+from datetime import date, datetime, time, timedelta
+from database.models import Party, Product, PurchaseRange, Sale, SaleItem
 from database.db_manager import db_manager
 from services.pricing_service import PricingService
 from services.inventory_service import InventoryService
+from ui.db_worker import DbWorker
+from utils.helpers import subtract_ranges
+from ui.entry_table import (
+    EntryRowsModel, TicketDelegate, SeriesDelegate, SpinDelegate, RemoveButtonDelegate
+)
+
+# One notes line: "Ticket Name | Series XXX | from-to | Qty N @ rate". Matched with finditer
+# over whole notes, so whitespace ([^\S\n]) must not run across line breaks.
+_ENTRY_RE = re.compile(
+    r'^(.+?)[^\S\n]*\|[^\S\n]*Series[^\S\n]+(\w*)[^\S\n]*\|[^\S\n]*(\d+)-(\d+)[^\S\n]*\|',
+    re.MULTILINE
+)
 
 
 class SaleWindow(QWidget):
     """Window for recording ticket sales with ranges."""
 
-    COL_INDEX = 0
-    COL_TICKET = 1
-    COL_SERIES = 2
-    COL_FROM = 3
-    COL_TO = 4
-    COL_QTY = 5
-    COL_RATE = 6
-    COL_AMOUNT = 7
-    COL_ACTIONS = 8
+    COL_INDEX = EntryRowsModel.COL_INDEX
+    COL_TICKET = EntryRowsModel.COL_TICKET
+    COL_SERIES = EntryRowsModel.COL_SERIES
+    COL_FROM = EntryRowsModel.COL_FROM
+    COL_TO = EntryRowsModel.COL_TO
+    COL_QTY = EntryRowsModel.COL_QTY
+    COL_RATE = EntryRowsModel.COL_RATE
+    COL_AMOUNT = EntryRowsModel.COL_AMOUNT
+    COL_ACTIONS = EntryRowsModel.COL_ACTIONS
 
     def __init__(self):
         super().__init__()
         self.products = []
+        self.product_model = QStandardItemModel(self)  # Ticket list shared by ticket editors
+        self._rate_cache = {}  # (party_id, product_id) -> sale rate
         self.session_entries = []  # Store current session entries
+        self._saving = False  # Sale being written on the DB worker
+        self.db_worker = DbWorker.shared()
+        self._rows_to_remove = []
         self.init_ui()
 
     def init_ui(self):
@@ -83,18 +102,38 @@ class SaleWindow(QWidget):
         header_layout.addWidget(report_btn)
         layout.addLayout(header_layout)
 
-        # Sale entries table
-        self.table = QTableWidget()
-        self.table.setColumnCount(9)
-        self.table.setHorizontalHeaderLabels([
-            "#", "Ticket", "Series", "From No.", "To No.", "Qty", "Rate", "Amount", ""
-        ])
+        # Sale entries table (editors are created only for the cell being edited)
+        self.model = EntryRowsModel('ticket_id', self)
+        self.model.totalsChanged.connect(self.update_totals)
+        self.model.ticketChanged.connect(self.on_ticket_changed)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(QHeaderView.Fixed)
         header.setSectionResizeMode(self.COL_TICKET, QHeaderView.Stretch)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setEditTriggers(
+            QAbstractItemView.CurrentChanged | QAbstractItemView.DoubleClicked |
+            QAbstractItemView.SelectedClicked | QAbstractItemView.EditKeyPressed |
+            QAbstractItemView.AnyKeyPressed
+        )
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
         self.table.verticalHeader().setVisible(False)
         self.table.setAlternatingRowColors(True)
+
+        self.ticket_delegate = TicketDelegate(self)
+        self.series_delegate = SeriesDelegate(self)
+        self.range_delegate = SpinDelegate(self)
+        self.rate_delegate = SpinDelegate(self, decimals=2)
+        self.remove_delegate = RemoveButtonDelegate(self)
+        self.table.setItemDelegateForColumn(self.COL_TICKET, self.ticket_delegate)
+        self.table.setItemDelegateForColumn(self.COL_SERIES, self.series_delegate)
+        self.table.setItemDelegateForColumn(self.COL_FROM, self.range_delegate)
+        self.table.setItemDelegateForColumn(self.COL_TO, self.range_delegate)
+        self.table.setItemDelegateForColumn(self.COL_RATE, self.rate_delegate)
+        self.table.setItemDelegateForColumn(self.COL_ACTIONS, self.remove_delegate)
+        for delegate in (self.ticket_delegate, self.series_delegate, self.range_delegate, self.rate_delegate):
+            delegate.closeEditor.connect(self.on_editor_closed)
+        self.remove_delegate.removeClicked.connect(self.remove_row)
         layout.addWidget(self.table)
 
         # Totals
@@ -127,21 +166,36 @@ class SaleWindow(QWidget):
 
     def refresh_data(self):
         """Load parties and tickets (products)."""
-        session = db_manager.get_session()
-        try:
-            # Parties
+        # Prices may have been edited since the last load
+        self._rate_cache.clear()
+        with db_manager.session_scope() as session:
+            # Parties (signals blocked so each addItem doesn't re-price every row)
+            current_party = self.party_combo.currentData()
+            self.party_combo.blockSignals(True)
             self.party_combo.clear()
-            for party in session.query(Party).all():
-                self.party_combo.addItem(party.name, party.id)
+            for party_id, party_name in session.query(Party.id, Party.name).all():
+                self.party_combo.addItem(party_name, party_id)
+            idx = self.party_combo.findData(current_party)
+            if idx >= 0:
+                self.party_combo.setCurrentIndex(idx)
+            self.party_combo.blockSignals(False)
 
             # Products (Tickets)
-            self.products = session.query(Product).all()
-        finally:
-            session.close()
-
-        # Restore session entries if they exist
-        if self.session_entries:
-            self.restore_session_entries()
+            self.products = session.query(Product.id, Product.name).all()
+            self.model.set_products(self.products)
+            self.product_model.clear()
+            for pid, pname in self.products:
+                item = QStandardItem(pname)
+                item.setData(pid, Qt.UserRole)
+                self.product_model.appendRow(item)
+
+        # Restore session entries if they exist, otherwise re-price rows once.
+        # A save in flight still owns the rows, so leave them as they are
+        if not self._saving:
+            if self.session_entries:
+                self.restore_session_entries()
+            else:
+                self.on_party_changed()
         
         # Auto-focus first field
         self.party_combo.setFocus()
@@ -158,596 +212,431 @@ class SaleWindow(QWidget):
         dialog.exec()
 
     def add_row(self):
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-
-        # Column: #
-        idx_item = QTableWidgetItem(str(row + 1))
-        idx_item.setTextAlignment(Qt.AlignCenter)
-        self.table.setItem(row, self.COL_INDEX, idx_item)
-
-        # Column: Ticket (Product)
-        ticket_combo = QComboBox()
-        for p in self.products:
-            ticket_combo.addItem(p.name, p.id)
-        ticket_combo.currentIndexChanged.connect(lambda _=None, r=row: self.on_ticket_changed(r))
-        self.table.setCellWidget(row, self.COL_TICKET, ticket_combo)
-
-        # Column: Series (digits + letter, auto uppercase)
-        series_edit = QLineEdit()
-        validator = QRegularExpressionValidator(QRegularExpression(r"^\d+[A-Za-z]$"))
-        series_edit.setValidator(validator)
-        series_edit.textChanged.connect(lambda _=None, r=row: self.on_series_changed(r))
-        self.table.setCellWidget(row, self.COL_SERIES, series_edit)
-
-        # Columns: From No. / To No.
-        from_spin = QSpinBox()
-        from_spin.setRange(0, 999999)
-        to_spin = QSpinBox()
-        to_spin.setRange(0, 999999)
-        to_spin.setKeyboardTracking(False)  # Only update on edit finish
-        from_spin.valueChanged.connect(lambda _=None, r=row: self.on_range_changed(r))
-        to_spin.valueChanged.connect(lambda _=None, r=row: self.on_to_changed(r))
-        to_spin.installEventFilter(self)
-        self.table.setCellWidget(row, self.COL_FROM, from_spin)
-        self.table.setCellWidget(row, self.COL_TO, to_spin)
-
-        # Column: Qty (read-only)
-        qty_item = QTableWidgetItem("0")
-        qty_item.setFlags(qty_item.flags() & ~Qt.ItemIsEditable)
-        qty_item.setTextAlignment(Qt.AlignCenter)
-        self.table.setItem(row, self.COL_QTY, qty_item)
-
-        # Column: Rate (auto from party+ticket, editable)
-        rate_spin = QDoubleSpinBox()
-        rate_spin.setRange(0.00, 999999)
-        rate_spin.setDecimals(2)
-        rate_spin.valueChanged.connect(lambda _=None, r=row: self.recalc_row_amount(r))
-        rate_spin.installEventFilter(self)  # Install event filter for Enter key
-        self.table.setCellWidget(row, self.COL_RATE, rate_spin)
-
-        # Column: Amount (read-only)
-        amt_item = QTableWidgetItem("₹ 0.00")
-        amt_item.setFlags(amt_item.flags() & ~Qt.ItemIsEditable)
-        amt_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-        self.table.setItem(row, self.COL_AMOUNT, amt_item)
-
-        # Column: Actions (Remove)
-        rm_btn = QPushButton("Remove")
-        rm_btn.clicked.connect(lambda _=None, r=row: self.remove_row(r))
-        self.table.setCellWidget(row, self.COL_ACTIONS, rm_btn)
+        """Append a row for the first ticket, priced for the current party."""
+        ticket_id = self.products[0][0] if self.products else None
+        row = self.model.append_row(ticket_id)
 
         # Initialize rate based on current party and ticket
         self.on_ticket_changed(row)
+        return row
 
-    def on_series_changed(self, row):
-        edit = self.table.cellWidget(row, self.COL_SERIES)
-        if not edit:
+    def edit_cell(self, row, column):
+        """Move the cursor to a cell and open its editor."""
+        index = self.model.index(row, column)
+        if not index.isValid():
             return
-        text = edit.text()
-        if text:
-            # Auto uppercase letters
-            upper = ''.join([ch.upper() if ch.isalpha() else ch for ch in text])
-            if upper != text:
-                old_block = edit.blockSignals(True)
-                edit.setText(upper)
-                edit.blockSignals(old_block)
-
-    def on_to_changed(self, row):
-        """Handle To No. changes with smart auto-completion."""
-        from_spin = self.table.cellWidget(row, self.COL_FROM)
-        to_spin = self.table.cellWidget(row, self.COL_TO)
-        if not (from_spin and to_spin):
+        self.table.setFocus()
+        self.table.setCurrentIndex(index)
+        # The CurrentChanged trigger may already have opened the editor
+        if self.table.indexWidget(index) is None:
+            self.table.edit(index)
+
+    def on_editor_closed(self, editor, hint):
+        """Enter moves Ticket -> Series -> From -> To -> Rate; Enter on Rate validates and adds a row."""
+        if hint != QAbstractItemDelegate.SubmitModelCache:
             return
-        
-        from_val = from_spin.value()
-        to_val = to_spin.value()
-        
-        # Smart auto-completion: if to_val is shorter than from_val, auto-complete
-        if from_val > 0 and to_val > 0:
-            from_str = str(from_val)
-            to_str = str(to_val)
-            
-            # If to_val has fewer digits, auto-complete from from_val
-            if len(to_str) < len(from_str):
-                # Replace last N digits of from_val with to_val
-                prefix = from_str[:-len(to_str)]
-                completed = int(prefix + to_str)
-                if completed != to_val:
-                    to_spin.blockSignals(True)
-                    to_spin.setValue(completed)
-                    to_spin.blockSignals(False)
-        
-        self.on_range_changed(row)
-    
-    def on_range_changed(self, row):
-        from_spin = self.table.cellWidget(row, self.COL_FROM)
-        to_spin = self.table.cellWidget(row, self.COL_TO)
-        qty_item = self.table.item(row, self.COL_QTY)
-        ticket_combo = self.table.cellWidget(row, self.COL_TICKET)
-        if not (from_spin and to_spin and qty_item and ticket_combo):
+        index = self.table.currentIndex()
+        r = index.row()
+        if index.column() != self.COL_RATE:
+            columns = EntryRowsModel.EDITABLE_COLUMNS
+            self.edit_cell(r, columns[columns.index(index.column()) + 1])
             return
-        f = from_spin.value()
-        t = to_spin.value()
-        base_qty = t - f + 1 if t >= f and f > 0 and t > 0 else 0
-        
-        # Extract ticket multiplier from ticket name (e.g., M5 -> 5, D10 -> 10, E200 -> 200)
-        ticket_name = ticket_combo.currentText()
-        multiplier = self.extract_ticket_multiplier(ticket_name)
-        
-        qty = base_qty * multiplier
-        qty_item.setText(str(qty))
-        self.recalc_row_amount(row)
-    
-    def extract_ticket_multiplier(self, ticket_name):
-        """Extract numeric multiplier from ticket name (e.g., 'M5' -> 5, 'D10' -> 10)."""
-        import re
-        match = re.search(r'\d+', ticket_name)
-        return int(match.group()) if match else 1
-    
-    def is_row_empty(self, row):
-        """Check if a row is completely empty (no data entered)."""
-        from_spin = self.table.cellWidget(row, self.COL_FROM)
-        to_spin = self.table.cellWidget(row, self.COL_TO)
-        
-        # Row is empty if from/to are both at default value (0)
-        if not from_spin or not to_spin:
-            return True
-        
-        return from_spin.value() == 0 and to_spin.value() == 0
+
+        # Validate current row
+        ok, err = self.validate_row(r)
+        if ok:
+            # Create new row and focus ticket
+            self.add_row()
+            self.edit_cell(r + 1, self.COL_TICKET)
+        else:
+            # Show validation error
+            QMessageBox.warning(self, "Validation Error", f"Row {r+1}: {err}")
 
     def on_ticket_changed(self, row):
         # When ticket or party changes, auto-populate rate
-        ticket_combo = self.table.cellWidget(row, self.COL_TICKET)
-        rate_spin = self.table.cellWidget(row, self.COL_RATE)
         party_id = self.party_combo.currentData()
-        if ticket_combo is None or rate_spin is None or not party_id:
+        product_id = self.model.row(row)['ticket_id']
+        if not party_id or not product_id:
             return
-        product_id = ticket_combo.currentData()
-        if product_id:
+        rate = self.get_rate(party_id, product_id)
+        self.model.setData(self.model.index(row, self.COL_RATE), rate)
+
+    def get_rate(self, party_id, product_id):
+        """Sale rate for a party and ticket, queried only on a cache miss."""
+        key = (party_id, product_id)
+        rate = self._rate_cache.get(key)
+        if rate is None:
             rate = PricingService.get_sale_rate(party_id, product_id)
-            old = rate_spin.blockSignals(True)
-            rate_spin.setValue(float(rate) if rate is not None else 0.0)
-            rate_spin.blockSignals(old)
-        # Recalculate quantity with new ticket multiplier
-        self.on_range_changed(row)
-        self.recalc_row_amount(row)
-
-    def recalc_row_amount(self, row):
-        qty_item = self.table.item(row, self.COL_QTY)
-        rate_spin = self.table.cellWidget(row, self.COL_RATE)
-        amt_item = self.table.item(row, self.COL_AMOUNT)
-        if not (qty_item and rate_spin and amt_item):
+            rate = float(rate) if rate is not None else 0.0
+            self._rate_cache[key] = rate
+        return rate
+
+    def prefetch_rates(self, party_id):
+        """Load the party's rates for all tickets in one query."""
+        if not party_id or not self.products:
             return
-        try:
-            qty = int(qty_item.text())
-        except ValueError:
-            qty = 0
-        amount = qty * rate_spin.value()
-        amt_item.setText(f"₹ {amount:,.2f}")
-        self.update_totals()
+        missing = [pid for pid, _name in self.products if (party_id, pid) not in self._rate_cache]
+        if not missing:
+            return
+        for product_id, rate in PricingService.get_sale_rates_bulk(party_id, missing).items():
+            self._rate_cache[(party_id, product_id)] = float(rate)
 
     def remove_row(self, row):
-        if row < 0 or row >= self.table.rowCount():
+        if row < 0 or row >= self.model.rowCount():
             return
-        self.table.removeRow(row)
-        # Renumber indexes
-        for r in range(self.table.rowCount()):
-            item = self.table.item(r, self.COL_INDEX)
-            if item:
-                item.setText(str(r + 1))
-        self.update_totals()
+        self.model.removeRow(row)
 
     def update_totals(self):
-        total_qty = 0
-        total_amount = 0.0
-        for r in range(self.table.rowCount()):
-            qty_item = self.table.item(r, self.COL_QTY)
-            amt_item = self.table.item(r, self.COL_AMOUNT)
-            if qty_item:
-                try:
-                    total_qty += int(qty_item.text())
-                except ValueError:
-                    pass
-            if amt_item:
-                txt = amt_item.text().replace("₹", "").replace(",", "").strip()
-                try:
-                    total_amount += float(txt)
-                except ValueError:
-                    pass
-        self.total_qty_label.setText(f"Total Qty: {total_qty}")
-        self.total_amount_label.setText(f"₹ {total_amount:,.2f}")
+        self.total_qty_label.setText(f"Total Qty: {self.model.total_qty}")
+        self.total_amount_label.setText(f"₹ {self.model.total_amount:,.2f}")
 
     def on_party_changed(self):
         # Refresh rate for all rows based on new party
-        for r in range(self.table.rowCount()):
-            self.on_ticket_changed(r)
+        self.prefetch_rates(self.party_combo.currentData())
+        rows = self.model.rowCount()
+        if not rows:
+            return
+        # Re-price silently, then notify the view and totals once instead of per row
+        self.model.blockSignals(True)
+        try:
+            for r in range(rows):
+                self.on_ticket_changed(r)
+        finally:
+            self.model.blockSignals(False)
+        self.model.dataChanged.emit(self.model.index(0, self.COL_RATE), self.model.index(rows - 1, self.COL_AMOUNT))
+        self.update_totals()
 
     def validate_row(self, row):
-        ticket_combo = self.table.cellWidget(row, self.COL_TICKET)
-        series_edit = self.table.cellWidget(row, self.COL_SERIES)
-        from_spin = self.table.cellWidget(row, self.COL_FROM)
-        to_spin = self.table.cellWidget(row, self.COL_TO)
-        rate_spin = self.table.cellWidget(row, self.COL_RATE)
-
-        if ticket_combo is None or ticket_combo.currentData() is None:
-            return False, "Please select a ticket."
+        entry = self.model.row(row)
+
+        err = self.entry_field_error(entry)
+        if err:
+            return False, err
+        return self.check_entry_stock(entry, self.date_edit.date().toPython())
+
+    @staticmethod
+    def entry_field_error(entry):
+        """Check an entry's own fields; returns an error message or None."""
+        if entry['ticket_id'] is None:
+            return "Please select a ticket."
         # Series can be blank - skip validation
-        if from_spin is None or to_spin is None:
-            return False, "From/To numbers are required."
-        if to_spin.value() < from_spin.value() or from_spin.value() <= 0:
-            return False, "Invalid range: To No. must be >= From No., both > 0."
-        if rate_spin is None or rate_spin.value() <= 0:
-            return False, "Rate must be greater than 0."
-        
+        if entry['to_no'] < entry['from_no'] or entry['from_no'] <= 0:
+            return "Invalid range: To No. must be >= From No., both > 0."
+        if entry['rate'] <= 0:
+            return "Rate must be greater than 0."
+        return None
+
+    def check_entry_stock(self, entry, sale_date, draw_ranges=None):
+        """Check an entry's range against earlier sales and purchased stock."""
         # Check if this range is available in stock
-        ticket_id = ticket_combo.currentData()
-        from_no = from_spin.value()
-        to_no = to_spin.value()
-        sale_date = self.date_edit.date().toPython()
-        
+        ticket_id = entry['ticket_id']
+        from_no = entry['from_no']
+        to_no = entry['to_no']
+        if draw_ranges is None:
+            draw_ranges = self.load_draw_ranges(sale_date)
+
         # Check for duplicate sale (same range already sold)
-        is_duplicate, err = self.check_duplicate_sale(ticket_id, from_no, to_no, sale_date)
+        is_duplicate, err = self.check_duplicate_sale(ticket_id, from_no, to_no, sale_date, draw_ranges)
         if is_duplicate:
             return False, err
-        
-        in_stock, err = self.check_stock_availability(ticket_id, from_no, to_no, sale_date)
+
+        in_stock, err = self.check_stock_availability(ticket_id, from_no, to_no, sale_date, draw_ranges)
         if not in_stock:
             return False, err
-        
+
         return True, None
-    
-    def check_duplicate_sale(self, ticket_id, from_no, to_no, sale_date):
-        """Check if this sale range has already been sold (to any party)."""
-        session = db_manager.get_session()
-        try:
-            from sqlalchemy import func
-            import re
-            
-            # Get the ticket name
-            product = session.query(Product).filter(Product.id == ticket_id).first()
-            if not product:
-                return False, None
-            
-            ticket_name = product.name
-            
-            # Get all sales for this draw date (regardless of party)
-            sales = session.query(Sale).filter(
-                func.date(Sale.sale_date) == sale_date
-            ).all()
-            
-            # Pattern to parse entries
-            pattern = r'^(.+?)\s*\|\s*Series\s+(\w*)\s*\|\s*(\d+)-(\d+)\s*\|'
-            
-            for sale in sales:
-                if sale.notes:
-                    for line in sale.notes.split('\n'):
-                        match = re.match(pattern, line)
-                        if match:
-                            line_ticket = match.group(1).strip()
-                            existing_from = int(match.group(3))
-                            existing_to = int(match.group(4))
-                            
-                            # Check if same ticket and overlapping range
-                            if line_ticket == ticket_name:
-                                # Check for any overlap
-                                if not (to_no < existing_from or from_no > existing_to):
-                                    return True, f"Range {from_no}-{to_no} overlaps with already sold range {existing_from}-{existing_to} for {ticket_name} on {sale_date.strftime('%d-%m-%y')}"
-            
+
+    def load_draw_ranges(self, sale_date):
+        """Load the ranges already purchased and sold for a draw date.
+
+        Returns a tuple (purchased, sold), both mapping ticket id to a list of (from, to)
+        ranges; purchased is None when nothing was purchased for the date.
+        """
+        with db_manager.session_scope() as session:
+            purchased = {}
+            for product_id, from_no, to_no in session.query(
+                PurchaseRange.product_id, PurchaseRange.from_no, PurchaseRange.to_no
+            ).filter(PurchaseRange.draw_date == sale_date).all():
+                purchased.setdefault(product_id, []).append((from_no, to_no))
+
+            # Only ids and notes are needed, so skip loading full Sale objects;
+            # plain bounds on sale_date can use its index
+            sale_filter = (
+                Sale.sale_date >= datetime.combine(sale_date, time.min),
+                Sale.sale_date < datetime.combine(sale_date + timedelta(days=1), time.min)
+            )
+            sales = session.query(Sale.id, Sale.notes).filter(*sale_filter).all()
+            # Sale notes hold one line per item in item order, so items give each line's ticket id
+            # even after the product was renamed
+            item_products = {}
+            for sale_id, product_id in session.query(SaleItem.sale_id, SaleItem.product_id).join(
+                Sale, SaleItem.sale_id == Sale.id
+            ).filter(*sale_filter).order_by(SaleItem.id):
+                item_products.setdefault(sale_id, []).append(product_id)
+
+            sold = {}
+            product_ids = None
+            for sale_id, notes in sales:
+                if not notes:
+                    continue
+                matches = list(_ENTRY_RE.finditer(notes))
+                products = item_products.get(sale_id, [])
+                if len(products) != len(matches):
+                    # Lines and items disagree; fall back to the current ticket names
+                    if product_ids is None:
+                        product_ids = {name: pid for pid, name in session.query(Product.id, Product.name)}
+                    products = [product_ids.get(match.group(1).strip()) for match in matches]
+                for match, product_id in zip(matches, products):
+                    if product_id is not None:
+                        sold.setdefault(product_id, []).append((int(match.group(3)), int(match.group(4))))
+            return purchased or None, sold
+
+    def check_duplicate_sale(self, ticket_id, from_no, to_no, sale_date, draw_ranges=None):
+        """Check if this sale range has already been sold (to any party).
+
+        draw_ranges is the result of load_draw_ranges(sale_date), shared across rows when given.
+        """
+        ticket_name = self.model.product_name(ticket_id)
+        if not ticket_name:
             return False, None
-        finally:
-            session.close()
-    
-    def check_stock_availability(self, ticket_id, from_no, to_no, sale_date):
-        """Check if the sale range is within available purchased stock for the exact draw date."""
-        session = db_manager.get_session()
-        try:
-            from sqlalchemy import func
-            import re
-            
-            # Get the ticket name for matching in notes
-            product = session.query(Product).filter(Product.id == ticket_id).first()
-            if not product:
-                return False, "Ticket not found"
-            
-            ticket_name = product.name
-            
-            # Get purchases for the EXACT draw date (purchase_date)
-            purchases = session.query(Purchase).filter(
-                func.date(Purchase.purchase_date) == sale_date
-            ).all()
-            
-            if not purchases:
-                return False, f"No stock available for draw date {sale_date.strftime('%d-%m-%y')}"
-            
-            # Extract purchased ranges for THIS ticket from matching draw date
-            purchased_ranges = []
-            # Pattern: Ticket Name | Series XXX | from-to | Qty N @ rate
-            pattern = r'^(.+?)\s*\|\s*Series\s+(\w*)\s*\|\s*(\d+)-(\d+)\s*\|'
-            
-            for purchase in purchases:
-                if purchase.notes:
-                    for line in purchase.notes.split('\n'):
-                        match = re.match(pattern, line)
-                        if match:
-                            line_ticket = match.group(1).strip()
-                            if line_ticket == ticket_name:
-                                purch_from = int(match.group(3))
-                                purch_to = int(match.group(4))
-                                purchased_ranges.append((purch_from, purch_to))
-            
-            if not purchased_ranges:
-                return False, f"No stock of '{ticket_name}' for draw date {sale_date.strftime('%d-%m-%y')}"
-            
-            # Get sales for this ticket and draw date
-            sales = session.query(Sale).filter(
-                func.date(Sale.sale_date) == sale_date
-            ).all()
-            
-            sold_ranges = []
-            for sale in sales:
-                if sale.notes:
-                    for line in sale.notes.split('\n'):
-                        match = re.match(pattern, line)
-                        if match:
-                            line_ticket = match.group(1).strip()
-                            if line_ticket == ticket_name:
-                                sold_from = int(match.group(3))
-                                sold_to = int(match.group(4))
-                                sold_ranges.append((sold_from, sold_to))
-            
-            # Calculate remaining available ranges
-            available_ranges = self._subtract_ranges(purchased_ranges, sold_ranges)
-            
-            if not available_ranges:
-                return False, f"No stock available. All '{ticket_name}' for {sale_date.strftime('%d-%m-%y')} has been sold."
-            
-            # Check if sale range is within any available range
-            for avail_from, avail_to in available_ranges:
-                if from_no >= avail_from and to_no <= avail_to:
-                    return True, None
-            
-            # Not found in any available range
-            ranges_str = ", ".join([f"{f}-{t}" for f, t in available_ranges])
-            return False, f"Range {from_no}-{to_no} not available. Available ranges for {sale_date.strftime('%d-%m-%y')}: {ranges_str}"
-        finally:
-            session.close()
+        if draw_ranges is None:
+            draw_ranges = self.load_draw_ranges(sale_date)
+        _purchased, sold = draw_ranges
+
+        # Sales for this draw date (regardless of party)
+        for existing_from, existing_to in sold.get(ticket_id, ()):
+            # Check for any overlap
+            if not (to_no < existing_from or from_no > existing_to):
+                return True, f"Range {from_no}-{to_no} overlaps with already sold range {existing_from}-{existing_to} for {ticket_name} on {sale_date.strftime('%d-%m-%y')}"
+
+        return False, None
     
-    def _subtract_ranges(self, purchased_ranges, sold_ranges):
-        """Calculate remaining available ranges by subtracting sold ranges from purchased ranges."""
-        if not sold_ranges:
-            return purchased_ranges
-        
-        # Merge overlapping purchased ranges
-        merged_purchased = self._merge_ranges(purchased_ranges)
-        # Merge overlapping sold ranges
-        merged_sold = self._merge_ranges(sold_ranges)
-        
-        remaining = []
-        for p_from, p_to in merged_purchased:
-            current_ranges = [(p_from, p_to)]
-            
-            # Subtract each sold range from current ranges
-            for s_from, s_to in merged_sold:
-                new_ranges = []
-                for c_from, c_to in current_ranges:
-                    # Check for overlap
-                    if s_to < c_from or s_from > c_to:
-                        # No overlap, keep the range
-                        new_ranges.append((c_from, c_to))
-                    else:
-                        # There's overlap, split the range
-                        if c_from < s_from:
-                            new_ranges.append((c_from, s_from - 1))
-                        if c_to > s_to:
-                            new_ranges.append((s_to + 1, c_to))
-                current_ranges = new_ranges
-            
-            remaining.extend(current_ranges)
-        
-        # Merge any overlapping resulting ranges
-        return self._merge_ranges(remaining)
+    def check_stock_availability(self, ticket_id, from_no, to_no, sale_date, draw_ranges=None):
+        """Check if the sale range is within available purchased stock for the exact draw date.
+
+        draw_ranges is the result of load_draw_ranges(sale_date), shared across rows when given.
+        """
+        ticket_name = self.model.product_name(ticket_id)
+        if not ticket_name:
+            return False, "Ticket not found"
+        if draw_ranges is None:
+            draw_ranges = self.load_draw_ranges(sale_date)
+        purchased, sold = draw_ranges
+
+        # Purchases for the EXACT draw date (purchase_date)
+        if purchased is None:
+            return False, f"No stock available for draw date {sale_date.strftime('%d-%m-%y')}"
+
+        purchased_ranges = purchased.get(ticket_id)
+        if not purchased_ranges:
+            return False, f"No stock of '{ticket_name}' for draw date {sale_date.strftime('%d-%m-%y')}"
+
+        # Calculate remaining available ranges
+        available_ranges = subtract_ranges(purchased_ranges, sold.get(ticket_id, []))
+
+        if not available_ranges:
+            return False, f"No stock available. All '{ticket_name}' for {sale_date.strftime('%d-%m-%y')} has been sold."
+
+        # Check if sale range is within any available range
+        for avail_from, avail_to in available_ranges:
+            if from_no >= avail_from and to_no <= avail_to:
+                return True, None
+
+        # Not found in any available range
+        ranges_str = ", ".join([f"{f}-{t}" for f, t in available_ranges])
+        return False, f"Range {from_no}-{to_no} not available. Available ranges for {sale_date.strftime('%d-%m-%y')}: {ranges_str}"
     
-    def _merge_ranges(self, ranges):
-        """Merge overlapping or adjacent ranges."""
-        if not ranges:
-            return []
-        
-        sorted_ranges = sorted(ranges)
-        merged = [sorted_ranges[0]]
-        
-        for current_from, current_to in sorted_ranges[1:]:
-            last_from, last_to = merged[-1]
-            if current_from <= last_to + 1:  # Overlapping or adjacent
-                merged[-1] = (last_from, max(last_to, current_to))
-            else:
-                merged.append((current_from, current_to))
-        
-        return merged
-
     def save_current_session(self):
         """Save current table entries to session storage."""
-        self.session_entries = []
-        for r in range(self.table.rowCount()):
-            ticket_combo = self.table.cellWidget(r, self.COL_TICKET)
-            series_edit = self.table.cellWidget(r, self.COL_SERIES)
-            from_spin = self.table.cellWidget(r, self.COL_FROM)
-            to_spin = self.table.cellWidget(r, self.COL_TO)
-            rate_spin = self.table.cellWidget(r, self.COL_RATE)
-            
-            if ticket_combo and series_edit and from_spin and to_spin and rate_spin:
-                entry = {
-                    'ticket_id': ticket_combo.currentData(),
-                    'series': series_edit.text(),
-                    'from_no': from_spin.value(),
-                    'to_no': to_spin.value(),
-                    'rate': rate_spin.value()
-                }
-                self.session_entries.append(entry)
-    
+        self.session_entries = [dict(entry) for entry in self.model.rows()]
+
     def restore_session_entries(self):
         """Restore session entries to table."""
-        self.table.setRowCount(0)
-        for entry in self.session_entries:
-            row = self.table.rowCount()
-            self.add_row()
-            
-            # Restore values
-            ticket_combo = self.table.cellWidget(row, self.COL_TICKET)
-            series_edit = self.table.cellWidget(row, self.COL_SERIES)
-            from_spin = self.table.cellWidget(row, self.COL_FROM)
-            to_spin = self.table.cellWidget(row, self.COL_TO)
-            rate_spin = self.table.cellWidget(row, self.COL_RATE)
-            
-            if ticket_combo:
-                idx = ticket_combo.findData(entry['ticket_id'])
-                if idx >= 0:
-                    ticket_combo.setCurrentIndex(idx)
-            if series_edit:
-                series_edit.setText(entry['series'])
-            if from_spin:
-                from_spin.setValue(entry['from_no'])
-            if to_spin:
-                to_spin.setValue(entry['to_no'])
-            if rate_spin:
-                rate_spin.setValue(entry['rate'])
-        
-        self.update_totals()
-    
+        # One model reset; rates come from the entries
+        self.model.set_rows(self.session_entries)
+
     def has_unsaved_entries(self):
         """Check if there are any valid unsaved entries and table is not locked."""
         # If table is disabled, entries are already saved
         if not self.table.isEnabled():
             return False
-        
+
         # Check if at least one row has valid data
-        for r in range(self.table.rowCount()):
-            if not self.is_row_empty(r):
+        for r in range(self.model.rowCount()):
+            if not self.model.is_row_empty(r):
                 return True
         return False
-    
+
     def clear_session(self):
         """Clear session entries (F9 handler)."""
         self.session_entries = []
-        self.table.setRowCount(0)
-        self.update_totals()
-        # Unlock and restore table
-        self.table.setEnabled(True)
-        self.table.setStyleSheet("")
+        with self._bulk():
+            self.model.clear()
+            # Unlock and restore table
+            self.table.setEnabled(True)
+            self.table.setStyleSheet("")
         self.party_combo.setEnabled(True)
         self.date_edit.setEnabled(True)
         self.party_combo.setFocus()
-    
+
     def save_sale(self):
+        if self._saving:
+            return  # Previous save still running
         if not self.party_combo.currentData():
             QMessageBox.warning(self, "Validation Error", "Please select a party.")
             return
-        if self.table.rowCount() == 0:
+        if self.model.rowCount() == 0:
             QMessageBox.warning(self, "Validation Error", "Please add at least one entry.")
             return
 
-        items = []
-        notes_rows = []
-        rows_to_remove = []  # Track empty rows to remove
-        
-        for r in range(self.table.rowCount()):
-            # Skip empty rows but track them for removal
-            if self.is_row_empty(r):
+        # Skip empty rows but track them for removal
+        entries = []
+        rows_to_remove = []
+        for r, entry in enumerate(self.model.rows()):
+            if self.model.is_row_empty(r):
                 rows_to_remove.append(r)
-                continue
-                
-            ok, err = self.validate_row(r)
+            else:
+                entries.append((r, entry))
+
+        # Field checks for every row first, database checks only once those pass
+        for r, entry in entries:
+            err = self.entry_field_error(entry)
+            if err:
+                QMessageBox.warning(self, "Validation Error", f"Row {r+1}: {err}")
+                return
+        # Load bought/sold ranges off the GUI thread; entry stays locked until the save finishes
+        check_date = self.date_edit.date().toPython()
+        self._rows_to_remove = rows_to_remove
+        self._lock_entry(True)
+        self._saving = True
+        if not self.db_worker.submit(
+            self.load_draw_ranges, check_date,
+            callback=lambda draw_ranges: self.on_draw_ranges_loaded(entries, check_date, draw_ranges),
+            owner=self, busy=True
+        ):
+            self._abort_save()
+            QMessageBox.warning(self, "Busy", "The database is busy. Please try again.")
+
+    def on_draw_ranges_loaded(self, entries, check_date, draw_ranges):
+        """Finish validating the sale against the loaded ranges, then write it on the worker."""
+        if isinstance(draw_ranges, Exception):
+            self._abort_save()
+            QMessageBox.critical(self, "Error", f"Error checking stock: {str(draw_ranges)}")
+            return
+        for r, entry in entries:
+            ok, err = self.check_entry_stock(entry, check_date, draw_ranges)
             if not ok:
+                self._abort_save()
                 QMessageBox.warning(self, "Validation Error", f"Row {r+1}: {err}")
                 return
-            ticket_combo = self.table.cellWidget(r, self.COL_TICKET)
-            series_edit = self.table.cellWidget(r, self.COL_SERIES)
-            from_spin = self.table.cellWidget(r, self.COL_FROM)
-            to_spin = self.table.cellWidget(r, self.COL_TO)
-            rate_spin = self.table.cellWidget(r, self.COL_RATE)
-            qty_item = self.table.item(r, self.COL_QTY)
-
-            qty = int(qty_item.text()) if qty_item else 0
-            items.append({
-                'product_id': ticket_combo.currentData(),
-                'quantity': qty,
-                'rate': float(rate_spin.value())
-            })
-
-            notes_rows.append(
-                f"{ticket_combo.currentText()} | Series {series_edit.text()} | {from_spin.value()}-{to_spin.value()} | Qty {qty} @ {rate_spin.value():.2f}"
-            )
-        
+
+        items = [
+            {
+                'product_id': entry['ticket_id'],
+                'quantity': entry['qty'],
+                'rate': entry['rate'],
+                'amount': entry['amount']
+            }
+            for _r, entry in entries
+        ]
+        notes_rows = [
+            f"{self.model.product_name(entry['ticket_id'])} | Series {entry['series']} | {entry['from_no']}-{entry['to_no']} | Qty {entry['qty']} @ {entry['rate']:.2f}"
+            for _r, entry in entries
+        ]
+
         # Check if we have any valid entries after skipping empty rows
         if not items:
+            self._abort_save()
             QMessageBox.warning(self, "Validation Error", "Please add at least one valid entry.")
             return
-        
+
         # Ask for confirmation before saving
         reply = QMessageBox.question(
-            self, 
-            "Confirm Save", 
+            self,
+            "Confirm Save",
             f"Do you want to save {len(items)} sale entry(ies)?",
             QMessageBox.Yes | QMessageBox.No,
             QMessageBox.No
         )
         if reply != QMessageBox.Yes:
+            self._abort_save()
             return
 
         party_id = self.party_combo.currentData()
-        sale_date = self.date_edit.date().toPython()
-        
+        sale_date = check_date
+
         # Prevent sales with draw dates in the past (can only sell on or before draw date)
         if sale_date < date.today():
-            QMessageBox.warning(self, "Validation Error", 
+            self._abort_save()
+            QMessageBox.warning(self, "Validation Error",
                               f"Cannot add sale for draw date {sale_date.strftime('%d-%m-%y')} as it is in the past. "
                               f"Sales can only be added on or before the draw date.")
             return
-        
+
         notes = "\n".join(notes_rows) if notes_rows else None
 
-        success, message, _sid = InventoryService.create_sale(
-            party_id, sale_date, items, None, notes
-        )
+        if not self.db_worker.submit(
+            InventoryService.create_sale, party_id, sale_date, items, None, notes,
+            callback=self.on_sale_saved, owner=self, busy=True
+        ):
+            self._abort_save()
+            QMessageBox.warning(self, "Busy", "The database is busy. Please try again.")
+
+    def _lock_entry(self, locked):
+        """Enable or disable the entry widgets."""
+        self.table.setEnabled(not locked)
+        self.party_combo.setEnabled(not locked)
+        self.date_edit.setEnabled(not locked)
+
+    def _abort_save(self):
+        """Unlock entry after a save that stopped before writing."""
+        self._saving = False
+        self._rows_to_remove = []
+        self._lock_entry(False)
+        self.table.setFocus()
+
+    def on_sale_saved(self, result):
+        self._saving = False
+        if isinstance(result, Exception):
+            result = (False, f"Error creating sale: {str(result)}", None)
+        success, message, _sid = result
         if success:
-            # Remove empty rows before locking
-            for r in reversed(rows_to_remove):
-                self.table.removeRow(r)
-            self.update_totals()
-            
+            # Remove empty rows before locking (one repaint for the whole batch)
+            with self._bulk():
+                for r in reversed(self._rows_to_remove):
+                    self.model.removeRow(r)
+
             QMessageBox.information(self, "Success", f"Sale saved successfully!\n{message}")
             # Lock the table and fade it
-            self.table.setEnabled(False)
+            self._lock_entry(True)
             self.table.setStyleSheet("opacity: 0.6; background-color: #f0f0f0;")
-            self.party_combo.setEnabled(False)
-            self.date_edit.setEnabled(False)
         else:
+            self._lock_entry(False)
             QMessageBox.critical(self, "Error", message)
+        self._rows_to_remove = []
 
     def clear_form(self):
-        self.date_edit.setDate(QDate.currentDate())
-        self.table.setRowCount(0)
-        self.update_totals()
+        with self._bulk():
+            self.date_edit.setDate(QDate.currentDate())
+            self.model.clear()
         self.party_combo.setFocus()
-    
-    def keyPressEvent(self, event):
-        """Handle Enter key to move between fields."""
-        from PySide6.QtGui import QKeyEvent
-        
-        if event.key() in (Qt.Key_Return, Qt.Key_Enter):
-            # Move to next focusable widget
-            self.focusNextChild()
-            event.accept()
-        else:
-            super().keyPressEvent(event)
-    
+
+    @contextmanager
+    def _bulk(self):
+        """Suspend table painting for a batch of changes; repaint once at the end."""
+        self.table.setUpdatesEnabled(False)
+        try:
+            yield
+        finally:
+            self.table.setUpdatesEnabled(True)
+            self.table.viewport().update()
+
     def eventFilter(self, obj, event):
-        """Filter events to handle Enter on To spinbox, Rate spinbox, date edit, and F9/F10 globally."""
-        from PySide6.QtCore import QEvent
-        from PySide6.QtGui import QKeyEvent
-        
+        """Filter events to handle Enter on the date edit and F9/F10 globally."""
         # Handle F9, F10 and F6 globally (regardless of which widget has focus)
         if event.type() == QEvent.KeyPress:
+            if event.key() in (Qt.Key_F9, Qt.Key_F10) and self._saving:
+                return True  # Rows can't be cleared or saved again until the save finishes
             if event.key() == Qt.Key_F9:
                 self.save_current_session()
                 self.clear_session()
@@ -761,62 +650,15 @@ class SaleWindow(QWidget):
         
         # Check if it's Enter key on date edit when table is empty
         if obj == self.date_edit and event.type() == QEvent.KeyPress:
-            if event.key() in (Qt.Key_Return, Qt.Key_Enter) and self.table.rowCount() == 0:
+            if event.key() in (Qt.Key_Return, Qt.Key_Enter) and self.model.rowCount() == 0:
                 self.add_row()
-                ticket_combo = self.table.cellWidget(0, self.COL_TICKET)
-                if ticket_combo:
-                    ticket_combo.setFocus()
+                self.edit_cell(0, self.COL_TICKET)
                 return True
         
-        # Check if it's Enter key on Rate spinbox
-        if event.type() == QEvent.KeyPress:
-            key_event = event
-            if key_event.key() in (Qt.Key_Return, Qt.Key_Enter):
-                # Find which row this rate spinbox belongs to
-                for r in range(self.table.rowCount()):
-                    rate_spin = self.table.cellWidget(r, self.COL_RATE)
-                    if obj == rate_spin:
-                        # Interpret the current value
-                        rate_spin.interpretText()
-                        
-                        # Validate current row
-                        ok, err = self.validate_row(r)
-                        if ok:
-                            # Create new row and focus ticket
-                            self.add_row()
-                            next_ticket = self.table.cellWidget(r + 1, self.COL_TICKET)
-                            if next_ticket:
-                                next_ticket.setFocus()
-                        else:
-                            # Show validation error
-                            QMessageBox.warning(self, "Validation Error", f"Row {r+1}: {err}")
-                        
-                        return True
-        
-        # Check if it's Enter key on To spinbox
-        if event.type() == QEvent.KeyPress:
-            key_event = event
-            if key_event.key() in (Qt.Key_Return, Qt.Key_Enter):
-                # Find which row this spinbox belongs to
-                for r in range(self.table.rowCount()):
-                    to_spin = self.table.cellWidget(r, self.COL_TO)
-                    if obj == to_spin:
-                        # Interpret the current value from line edit
-                        to_spin.interpretText()
-                        
-                        # Move focus to rate spinbox in same row
-                        rate_spin = self.table.cellWidget(r, self.COL_RATE)
-                        if rate_spin:
-                            rate_spin.setFocus()
-                            rate_spin.selectAll()
-                        
-                        return True
-        
         return super().eventFilter(obj, event)
     
     def keyPressEvent(self, event):
         """Handle Enter key to move between fields."""
-        from PySide6.QtGui import QKeyEvent
         if event.key() in (Qt.Key_Return, Qt.Key_Enter):
             # Move to next focusable widget
             self.focusNextChild()
@@ -1,20 +1,127 @@
 """Stock view window with draw date filtering."""
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
-    QTableWidget, QTableWidgetItem, QHeaderView, QComboBox, QDateEdit, QMessageBox
+    QTableView, QAbstractItemView, QHeaderView, QComboBox, QDateEdit, QMessageBox
 )
-from PySide6.QtCore import Qt, QDate
+from PySide6.QtCore import Qt, QDate, QAbstractTableModel, QModelIndex, QEvent
 from PySide6.QtGui import QColor, QShortcut, QKeySequence
-from database.models import Distributor, Purchase, Sale, Product
+from database.models import Distributor, Purchase, PurchaseRange, Sale, SaleItem, Product
 from database.db_manager import db_manager
+from ui.db_worker import DbWorker
+from ui.entry_table import EntryRowsModel
+from utils.helpers import subtract_ranges
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import NamedTuple, Optional
+import logging
+import math
 import re
 
+logger = logging.getLogger(__name__)
+
+# A series is any run of word characters, as the old notes regex's Series\s+(\w*) accepted
+_SERIES_RE = re.compile(r'\w*')
+
+
+class StockEntry(NamedTuple):
+    """One ticket range: a parsed notes line, a purchased or sold range, or remaining stock."""
+    ticket: str
+    series: str
+    from_no: int
+    to_no: int
+    qty: int = 0
+    rate: float = 0.0
+    draw_date: Optional[date] = None
+    distributor_name: str = ''
+    product_id: Optional[int] = None
+
+
+class StockTableModel(QAbstractTableModel):
+    """Read-only table model for remaining stock ranges.
+
+    set_rows takes StockEntry rows, formats every cell once and keeps the totals,
+    so data() is a plain lookup.
+    """
+
+    COL_INDEX = 0
+    COL_DISTRIBUTOR = 1
+    COL_TICKET = 2
+    COL_SERIES = 3
+    COL_FROM = 4
+    COL_TO = 5
+    COL_QTY = 6
+    COL_RATE = 7
+    COL_AMOUNT = 8
+
+    HEADERS = ["#", "Distributor", "Ticket", "Series", "From No.", "To No.", "Qty", "Rate", "Amount"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []  # tuple of display strings per row
+        self.total_qty = 0
+        self.total_amount = 0.0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        col = index.column()
+        if role == Qt.DisplayRole:
+            return self._rows[index.row()][col]
+        elif role == Qt.TextAlignmentRole:
+            if col in (self.COL_RATE, self.COL_AMOUNT):
+                return Qt.AlignRight | Qt.AlignVCenter
+            if col not in (self.COL_DISTRIBUTOR, self.COL_TICKET):
+                return Qt.AlignCenter
+        return None
+
+    def set_rows(self, entries):
+        """Replace all rows with a single model reset."""
+        rows = []
+        total_qty = 0
+        total_amount = 0.0
+        for i, entry in enumerate(entries):
+            amount = entry.qty * entry.rate
+            rows.append((
+                str(i + 1),
+                entry.distributor_name,
+                entry.ticket,
+                entry.series,
+                str(entry.from_no),
+                str(entry.to_no),
+                str(entry.qty),
+                f"₹ {entry.rate:.2f}",
+                f"₹ {amount:,.2f}"
+            ))
+            total_qty += entry.qty
+            total_amount += amount
+
+        self.beginResetModel()
+        self._rows = rows
+        self.total_qty = total_qty
+        self.total_amount = total_amount
+        self.endResetModel()
+
 
 class StockWindow(QWidget):
     """Window for viewing stock by draw date."""
 
     def __init__(self):
         super().__init__()
+        self._loading = False
+        self._distributors = None  # (id, name) rows currently in the distributor combo
+        # Stock queries and range arithmetic run off the GUI thread
+        self.db_worker = DbWorker.shared()
         self.init_ui()
 
     def init_ui(self):
@@ -86,16 +193,14 @@ class StockWindow(QWidget):
         self.submit_btn.installEventFilter(self)
 
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(9)
-        self.table.setHorizontalHeaderLabels([
-            "#", "Distributor", "Ticket", "Series", "From No.", "To No.", "Qty", "Rate", "Amount"
-        ])
+        self.model = StockTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(QHeaderView.Fixed)
         header.setSectionResizeMode(1, QHeaderView.Stretch)
         header.setSectionResizeMode(2, QHeaderView.Stretch)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.table.verticalHeader().setVisible(False)
         self.table.setAlternatingRowColors(True)
         layout.addWidget(self.table)
@@ -125,12 +230,23 @@ class StockWindow(QWidget):
         """Load distributors."""
         session = db_manager.get_session()
         try:
-            self.distributor_combo.clear()
-            self.distributor_combo.addItem("All Distributors", None)
-            for dist in session.query(Distributor).all():
-                self.distributor_combo.addItem(dist.name, dist.id)
+            distributors = [
+                tuple(row) for row in session.query(Distributor.id, Distributor.name).order_by(Distributor.id).all()
+            ]
         finally:
             session.close()
+
+        # Rebuild the combo only when the distributors changed since the last refresh
+        if distributors != self._distributors:
+            self._distributors = distributors
+            current_dist = self.distributor_combo.currentData()
+            self.distributor_combo.clear()
+            self.distributor_combo.addItem("All Distributors", None)
+            for dist_id, dist_name in distributors:
+                self.distributor_combo.addItem(dist_name, dist_id)
+            idx = self.distributor_combo.findData(current_dist)
+            if idx >= 0:
+                self.distributor_combo.setCurrentIndex(idx)
         
         # Auto-focus first field
         self.distributor_combo.setFocus()
@@ -144,254 +260,212 @@ class StockWindow(QWidget):
         if from_date > to_date:
             QMessageBox.warning(self, "Validation Error", "From Date cannot be after To Date.")
             return
+        if self._loading:
+            return  # Previous load still running
+
+        self._loading = True
+        self.submit_btn.setEnabled(False)
+        if not self.db_worker.submit(
+            self.compute_remaining_stock, distributor_id, from_date, to_date,
+            callback=self.on_stock_loaded, owner=self, busy=True
+        ):
+            self._loading = False
+            self.submit_btn.setEnabled(True)
+            QMessageBox.warning(self, "Busy", "The database is busy. Please try again.")
+
+    def on_stock_loaded(self, result):
+        self._loading = False
+        self.submit_btn.setEnabled(True)
+        if isinstance(result, Exception):
+            QMessageBox.critical(self, "Error", f"Error loading stock: {str(result)}")
+            return
+        self.display_entries(result)
 
+    def compute_remaining_stock(self, distributor_id, from_date, to_date):
+        """Query purchased and sold ranges and return the remaining stock entries.
+
+        Runs on the DB worker thread, so it must not touch any widget.
+        """
         session = db_manager.get_session()
         try:
-            # Get purchases for distributor(s) and date range
-            from sqlalchemy import func
-            purchase_query = session.query(Purchase).filter(
-                func.date(Purchase.purchase_date) >= from_date,
-                func.date(Purchase.purchase_date) <= to_date
+            # Purchased ranges for distributor(s) and date range, read from purchase_ranges
+            range_query = session.query(
+                PurchaseRange.product_id,
+                Product.name,
+                PurchaseRange.series,
+                PurchaseRange.from_no,
+                PurchaseRange.to_no,
+                PurchaseRange.rate,
+                PurchaseRange.draw_date,
+                Distributor.name
+            ).join(Product, PurchaseRange.product_id == Product.id).join(
+                Purchase, PurchaseRange.purchase_id == Purchase.id
+            ).join(Distributor, Purchase.distributor_id == Distributor.id).filter(
+                PurchaseRange.draw_date >= from_date,
+                PurchaseRange.draw_date <= to_date
             )
             
             # If specific distributor selected, filter by it
             if distributor_id is not None:
-                purchase_query = purchase_query.filter(Purchase.distributor_id == distributor_id)
+                range_query = range_query.filter(Purchase.distributor_id == distributor_id)
             
-            purchases = purchase_query.all()
-
-            # Get sales for this date range (any party)
-            sales = session.query(Sale).filter(
-                func.date(Sale.sale_date) >= from_date,
-                func.date(Sale.sale_date) <= to_date
-            ).all()
-
-            # Parse purchase entries from notes
-            purchase_entries = []
-            for purchase in purchases:
-                if purchase.notes:
-                    for line in purchase.notes.split('\n'):
-                        parsed = self.parse_entry_line(line)
-                        if parsed:
-                            parsed['type'] = 'purchase'
-                            parsed['purchase_id'] = purchase.id
-                            parsed['distributor_name'] = purchase.distributor.name
-                            parsed['purchase_date'] = purchase.purchase_date.date()
-                            purchase_entries.append(parsed)
-
-            # Parse sale entries from notes
+            purchase_entries = [
+                StockEntry(
+                    ticket, series, from_no, to_no,
+                    rate=rate, draw_date=draw_date, distributor_name=distributor_name, product_id=product_id
+                )
+                for product_id, ticket, series, from_no, to_no, rate, draw_date, distributor_name
+                in range_query.order_by(PurchaseRange.id).all()
+            ]
+
+            # Get sales for this date range (any party); plain bounds on sale_date can use its index.
+            # Only the columns used below are selected, so no Sale objects are built
+            sale_filter = (
+                Sale.sale_date >= datetime.combine(from_date, time.min),
+                Sale.sale_date < datetime.combine(to_date + timedelta(days=1), time.min),
+                Sale.notes.isnot(None)
+            )
+            sales = session.query(Sale.id, Sale.sale_date, Sale.notes).filter(*sale_filter).all()
+            # Sale notes hold one line per item in item order, so items give each line's product
+            # even after the product was renamed
+            item_products = {}
+            for sale_id, product_id in session.query(SaleItem.sale_id, SaleItem.product_id).join(
+                Sale, SaleItem.sale_id == Sale.id
+            ).filter(*sale_filter).order_by(SaleItem.id):
+                item_products.setdefault(sale_id, []).append(product_id)
+            product_ids = None
+
+            # Parse sale entries from notes (parsed lines are cached per notes text)
             sale_entries = []
-            for sale in sales:
-                if sale.notes:
-                    for line in sale.notes.split('\n'):
-                        parsed = self.parse_entry_line(line)
-                        if parsed:
-                            parsed['type'] = 'sale'
-                            parsed['sale_id'] = sale.id
-                            parsed['sale_date'] = sale.sale_date.date()
-                            sale_entries.append(parsed)
+            for sale_id, sale_datetime, notes in sales:
+                sale_date = sale_datetime.date()
+                parsed_entries = self.parse_notes(notes)
+                products = item_products.get(sale_id, [])
+                if len(products) != len(parsed_entries):
+                    # Lines and items disagree; fall back to the current ticket names
+                    if product_ids is None:
+                        product_ids = {name: pid for pid, name in session.query(Product.id, Product.name)}
+                    products = [product_ids.get(parsed.ticket) for parsed in parsed_entries]
+                for parsed, product_id in zip(parsed_entries, products):
+                    sale_entries.append(parsed._replace(draw_date=sale_date, product_id=product_id))
 
             # Calculate remaining stock by subtracting sold ranges from purchased ranges
-            remaining_stock = self.calculate_remaining_stock(purchase_entries, sale_entries)
-            self.display_entries(remaining_stock)
+            return self.calculate_remaining_stock(purchase_entries, sale_entries)
 
         finally:
             session.close()
     
     def calculate_remaining_stock(self, purchase_entries, sale_entries):
         """Calculate remaining stock by subtracting sold ranges from purchased ranges."""
-        # Group purchases by ticket, series, and date
-        from collections import defaultdict
-        purchase_groups = defaultdict(list)
-        
+        # Group purchased ranges by product, series, and date in one pass (first entry of a group is its template)
+        purchase_groups = {}
         for entry in purchase_entries:
-            key = (entry['ticket'], entry['series'], entry['purchase_date'])
-            purchase_groups[key].append(entry)
+            key = (entry.product_id, entry.series, entry.draw_date)
+            group = purchase_groups.get(key)
+            if group is None:
+                purchase_groups[key] = (entry, [(entry.from_no, entry.to_no)])
+            else:
+                group[1].append((entry.from_no, entry.to_no))
         
-        # Group sales by ticket, series, and date
-        sale_groups = defaultdict(list)
+        # Group sold ranges by product, series, and date
+        sale_groups = {}
         for entry in sale_entries:
-            key = (entry['ticket'], entry['series'], entry['sale_date'])
-            sale_groups[key].append(entry)
+            key = (entry.product_id, entry.series, entry.draw_date)
+            sale_groups.setdefault(key, []).append((entry.from_no, entry.to_no))
         
         # Calculate remaining stock for each group
         remaining = []
-        for key, purchases in purchase_groups.items():
-            ticket, series, draw_date = key
-            
-            # Get all purchased ranges for this group
-            purchased_ranges = [(p['from_no'], p['to_no']) for p in purchases]
-            
-            # Get all sold ranges for this group
-            sold_ranges = [(s['from_no'], s['to_no']) for s in sale_groups.get(key, [])]
+        for key, (template, purchased_ranges) in purchase_groups.items():
+            product_id, series, draw_date = key
+            ticket = template.ticket
             
             # Calculate remaining ranges
-            available_ranges = self._subtract_ranges(purchased_ranges, sold_ranges)
+            available_ranges = subtract_ranges(purchased_ranges, sale_groups.get(key, []))
+            
+            # Extract ticket multiplier from ticket name (e.g., M5 -> 5, D10 -> 10, E200 -> 200)
+            multiplier = EntryRowsModel.extract_ticket_multiplier(ticket)
             
             # Create entries for each remaining range
             for from_no, to_no in available_ranges:
-                base_qty = to_no - from_no + 1
-                # Extract ticket multiplier from ticket name (e.g., M5 -> 5, D10 -> 10, E200 -> 200)
-                multiplier = self.extract_ticket_multiplier(ticket)
-                qty = base_qty * multiplier
-                # Use the first purchase entry as template
-                template = purchases[0]
-                remaining.append({
-                    'ticket': ticket,
-                    'series': series,
-                    'from_no': from_no,
-                    'to_no': to_no,
-                    'qty': qty,
-                    'rate': template['rate'],
-                    'distributor_name': template['distributor_name']
-                })
+                remaining.append(StockEntry(
+                    ticket, series, from_no, to_no,
+                    qty=(to_no - from_no + 1) * multiplier,
+                    rate=template.rate,
+                    draw_date=draw_date,
+                    distributor_name=template.distributor_name,
+                    product_id=product_id
+                ))
         
         return remaining
     
-    def extract_ticket_multiplier(self, ticket_name):
-        """Extract numeric multiplier from ticket name (e.g., 'M5' -> 5, 'D10' -> 10)."""
-        import re
-        match = re.search(r'\d+', ticket_name)
-        return int(match.group()) if match else 1
-    
-    def _subtract_ranges(self, purchased_ranges, sold_ranges):
-        """Calculate remaining available ranges by subtracting sold ranges from purchased ranges."""
-        if not sold_ranges:
-            return purchased_ranges
-        
-        # Merge overlapping purchased ranges
-        merged_purchased = self._merge_ranges(purchased_ranges)
-        # Merge overlapping sold ranges
-        merged_sold = self._merge_ranges(sold_ranges)
-        
-        remaining = []
-        for p_from, p_to in merged_purchased:
-            current_ranges = [(p_from, p_to)]
-            
-            # Subtract each sold range from current ranges
-            for s_from, s_to in merged_sold:
-                new_ranges = []
-                for c_from, c_to in current_ranges:
-                    # Check for overlap
-                    if s_to < c_from or s_from > c_to:
-                        # No overlap, keep the range
-                        new_ranges.append((c_from, c_to))
-                    else:
-                        # There's overlap, split the range
-                        if c_from < s_from:
-                            new_ranges.append((c_from, s_from - 1))
-                        if c_to > s_to:
-                            new_ranges.append((s_to + 1, c_to))
-                current_ranges = new_ranges
-            
-            remaining.extend(current_ranges)
-        
-        # Merge any overlapping resulting ranges
-        return self._merge_ranges(remaining)
-    
-    def _merge_ranges(self, ranges):
-        """Merge overlapping or adjacent ranges."""
-        if not ranges:
-            return []
-        
-        sorted_ranges = sorted(ranges)
-        merged = [sorted_ranges[0]]
-        
-        for current_from, current_to in sorted_ranges[1:]:
-            last_from, last_to = merged[-1]
-            if current_from <= last_to + 1:  # Overlapping or adjacent
-                merged[-1] = (last_from, max(last_to, current_to))
-            else:
-                merged.append((current_from, current_to))
-        
-        return merged
-
-    def parse_entry_line(self, line):
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def parse_notes(notes):
+        """Parse every entry line of a notes text into a tuple of StockEntry.
+
+        Cached by the text, so repeat loads skip parsing.
+        """
+        entries = []
+        for line in notes.splitlines():
+            # An entry line has at least three '|' separators; skip blank and free-text lines cheaply
+            if line.count('|') < 3:
+                continue
+            parsed = StockWindow.parse_entry_line(line)
+            if parsed:
+                entries.append(parsed)
+        return tuple(entries)
+
+    @staticmethod
+    def parse_entry_line(line):
         """Parse a note line like 'Ticket Name | Series 61A | 1-100 | Qty 100 @ 5.00' or 'D10 | Series  | 45450-45499 | Qty 500 @ 6.44'"""
-        # Pattern: Ticket Name | Series XXX | from-to | Qty N @ rate
-        # Series field can be empty/spaces or contain alphanumeric code
-        pattern = r'^(.+?)\s*\|\s*Series\s+(\w*)\s*\|\s*(\d+)-(\d+)\s*\|\s*Qty\s+(\d+)\s*@\s*([\d.]+)'
-        match = re.match(pattern, line)
-        if match:
-            return {
-                'ticket': match.group(1).strip(),
-                'series': match.group(2) if match.group(2) else '',
-                'from_no': int(match.group(3)),
-                'to_no': int(match.group(4)),
-                'qty': int(match.group(5)),
-                'rate': float(match.group(6))
-            }
-        return None
+        # Fields are separated by '|': Ticket Name | Series XXX | from-to | Qty N @ rate
+        # Series field can be empty/spaces or contain an alphanumeric code
+        parts = line.split('|', 3)
+        if len(parts) != 4:
+            return None
+        ticket = parts[0].strip()
+        label, _, series = parts[1].strip().partition(' ')
+        series = series.strip()
+        from_no, _, to_no = parts[2].partition('-')
+        qty_field, _, rate = parts[3].partition('@')
+        qty_label, _, qty = qty_field.strip().partition(' ')
+        if not ticket or label != 'Series' or qty_label != 'Qty':
+            return None
+        if not _SERIES_RE.fullmatch(series):
+            return None
+        from_no, to_no, qty = from_no.strip(), to_no.strip(), qty.strip()
+        if not (from_no.isdecimal() and to_no.isdecimal() and qty.isdecimal()):
+            return None
+        try:
+            rate = float(rate)
+        except ValueError:
+            return None
+        # float() also accepts 'nan', 'inf' and negative numbers, which no saved rate can be
+        if not math.isfinite(rate) or rate < 0:
+            return None
+        return StockEntry(ticket, series, int(from_no), int(to_no), int(qty), rate)
 
     def display_entries(self, entries):
         """Display entries in table."""
-        self.table.setRowCount(len(entries))
-        total_qty = 0
-        total_amount = 0.0
-
-        for row, entry in enumerate(entries):
-            # #
-            idx_item = QTableWidgetItem(str(row + 1))
-            idx_item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(row, 0, idx_item)
-
-            # Distributor
-            self.table.setItem(row, 1, QTableWidgetItem(entry.get('distributor_name', '')))
-
-            # Ticket
-            self.table.setItem(row, 2, QTableWidgetItem(entry['ticket']))
-
-            # Series
-            series_item = QTableWidgetItem(entry['series'])
-            series_item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(row, 3, series_item)
-
-            # From No.
-            from_item = QTableWidgetItem(str(entry['from_no']))
-            from_item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(row, 4, from_item)
-
-            # To No.
-            to_item = QTableWidgetItem(str(entry['to_no']))
-            to_item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(row, 5, to_item)
-
-            # Qty
-            qty_item = QTableWidgetItem(str(entry['qty']))
-            qty_item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(row, 6, qty_item)
-
-            # Rate
-            rate_item = QTableWidgetItem(f"₹ {entry['rate']:.2f}")
-            rate_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            self.table.setItem(row, 7, rate_item)
-
-            # Amount
-            amount = entry['qty'] * entry['rate']
-            amount_item = QTableWidgetItem(f"₹ {amount:,.2f}")
-            amount_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            self.table.setItem(row, 8, amount_item)
-
-            total_qty += entry['qty']
-            total_amount += amount
+        # One model reset; cells are formatted and totalled once
+        self.model.set_rows(entries)
 
-        self.total_qty_label.setText(f"Total Qty: {total_qty}")
-        self.total_amount_label.setText(f"₹ {total_amount:,.2f}")
+        self.total_qty_label.setText(f"Total Qty: {self.model.total_qty}")
+        self.total_amount_label.setText(f"₹ {self.model.total_amount:,.2f}")
     
     def eventFilter(self, obj, event):
         """Handle Enter key for combo box and date edits."""
-        from PySide6.QtCore import QEvent
         if event.type() == QEvent.KeyPress:
             if event.key() in (Qt.Key_Return, Qt.Key_Enter):
-                print(f"DEBUG: Enter key pressed on {obj.__class__.__name__}")
+                logger.debug("Enter key pressed on %s", obj.__class__.__name__)
                 
                 # If on to_date_edit or submit button, trigger submit
                 if obj == self.to_date_edit or obj == self.submit_btn:
-                    print("DEBUG: Triggering load_stock")
+                    logger.debug("Triggering load_stock")
                     self.load_stock()
                     return True
                 # Otherwise move to next field
-                print("DEBUG: Moving to next field")
+                logger.debug("Moving to next field")
                 self.focusNextChild()
                 return True
         return super().eventFilter(obj, event)
@@ -404,7 +478,6 @@ class StockWindow(QWidget):
     
     def keyPressEvent(self, event):
         """Handle Enter key to move between fields."""
-        from PySide6.QtGui import QKeyEvent
         if event.key() in (Qt.Key_Return, Qt.Key_Enter):
             # Move to next focusable widget
             self.focusNextChild()
@@ -25,3 +25,56 @@ def parse_float(value_str):
         return float(cleaned)
     except ValueError:
         return 0.0
+
+
+def merge_ranges(ranges):
+    """Merge overlapping or adjacent (from, to) ranges into a sorted list."""
+    return _merge_sorted_ranges(sorted(ranges))
+
+
+def _merge_sorted_ranges(sorted_ranges):
+    """Merge overlapping or adjacent ranges that are already sorted (no sort pass)."""
+    if not sorted_ranges:
+        return []
+    
+    merged = [sorted_ranges[0]]
+    
+    for current_from, current_to in sorted_ranges[1:]:
+        last_from, last_to = merged[-1]
+        if current_from <= last_to + 1:  # Overlapping or adjacent
+            merged[-1] = (last_from, max(last_to, current_to))
+        else:
+            merged.append((current_from, current_to))
+    
+    return merged
+
+
+def subtract_ranges(purchased_ranges, sold_ranges):
+    """Calculate remaining available ranges by subtracting sold ranges from purchased ranges."""
+    if not sold_ranges:
+        return purchased_ranges
+    
+    merged_purchased = merge_ranges(purchased_ranges)
+    merged_sold = merge_ranges(sold_ranges)
+    
+    # Both lists are sorted and disjoint, so one sweep over them covers every overlap
+    remaining = []
+    sold_count = len(merged_sold)
+    first = 0
+    for p_from, p_to in merged_purchased:
+        start = p_from
+        # Skip sold ranges that end before this purchased range
+        while first < sold_count and merged_sold[first][1] < p_from:
+            first += 1
+        i = first
+        while i < sold_count and merged_sold[i][0] <= p_to:
+            s_from, s_to = merged_sold[i]
+            if s_from > start:
+                remaining.append((start, s_from - 1))
+            start = max(start, s_to + 1)
+            i += 1
+        if start <= p_to:
+            remaining.append((start, p_to))
+    
+    # The sweep emits ranges in order, so merging what remains needs no sort
+    return _merge_sorted_ranges(remaining)